@@ -1,17 +1,58 @@
 # app/controllers/members_controller.py
-from fastapi import APIRouter, HTTPException, status, Body
+import math
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, status, Body
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.models.member import (
+    MEMBER_FIELDS, BatchResponse, DetailResponse, MemberChangesResponse, MemberRecord,
+    MembersPageResponse
+)
+from app.services.member_batch import iter_ndjson, iter_operations, run_batch
 from app.services.members_service import (
-    get_all_members, create_member, update_member, delete_member
+    query_members, member_changes, create_member, update_member, delete_member
 )
+from app.utils.encoded_response import (
+    EncodedCache, conditional_response, encode_json, http_date
+)
+from app.utils.metrics import stage
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
-router = APIRouter()
+# Listados ya serializados y comprimidos, por versión de la proyección y consulta
+encoded_members = EncodedCache()
 
 # GET: Listar miembros (público)
-@router.get("/")
-async def list_members():
+@router.get("/", response_model=MembersPageResponse)
+async def list_members(
+    request: Request,
+    page: int = Query(1, ge=1, description="Página (desde 1)"),
+    per_page: Optional[int] = Query(
+        None, alias="perPage", ge=1, le=1000,
+        description="Miembros por página (por defecto, todos)"
+    ),
+    capitulo: Optional[str] = Query(None, description="Filtra por nombre de capítulo"),
+    rol: Optional[str] = Query(None, description="Filtra por nombre de rol"),
+    anio_ingreso: Optional[str] = Query(None, description="Filtra por año de ingreso"),
+    q: Optional[str] = Query(None, description="Busca en el nombre completo"),
+    fields: Optional[str] = Query(
+        None, description=f"Campos a retornar, separados por coma ({', '.join(MEMBER_FIELDS)})"
+    ),
+):
+    selected = None
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in MEMBER_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos desconocidos: {', '.join(unknown)}"
+            )
     try:
-        members = await get_all_members()
-        return {"data": members}
+        with stage("query"):
+            result = await query_members(capitulo, rol, anio_ingreso, q, page, per_page)
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -20,8 +61,74 @@ async def list_members():
             detail=f"Error al obtener los miembros: {str(e)}"
         )
 
+    headers = {}
+    if result.cache is not None:
+        headers["X-Cache"] = result.cache.status
+        headers["Age"] = str(int(result.cache.age))
+
+    # Misma versión de datos y misma consulta: se reutiliza el cuerpo ya codificado
+    key = None
+    if result.version is not None:
+        key = (result.version, page, per_page, capitulo, rol, anio_ingreso, q,
+               tuple(selected or ()))
+        encoded = encoded_members.get(key)
+        if encoded is not None:
+            return conditional_response(request.headers, encoded, headers)
+
+    items = result.items
+    if selected:
+        items = [{field: getattr(member, field) for field in selected} for member in items]
+    total_pages = math.ceil(result.total / per_page) if per_page else 1
+    next_link = None
+    if page < total_pages:
+        next_url = request.url.include_query_params(page=page + 1)
+        next_link = f"{next_url.path}?{next_url.query}"
+    # Serializar y comprimir un listado grande bloquearía el event loop
+    with stage("serialize"):
+        encoded = await run_in_threadpool(encode_json, {
+            "data": items,
+            "page": page,
+            # Sin paginar, la página es el total (al menos 1: perPage=0 no es válido)
+            "perPage": per_page or max(result.total, 1),
+            "totalItems": result.total,
+            "totalPages": max(total_pages, 1),
+            "next": next_link,
+        }, http_date(result.last_modified))
+    if key is not None:
+        encoded_members.put(key, encoded)
+    return conditional_response(request.headers, encoded, headers)
+
+# GET: Cambios de miembros desde un cursor (público)
+@router.get(
+    "/changes", response_model=MemberChangesResponse,
+    responses={501: {"model": DetailResponse, "description": "La caché de miembros está desactivada"}},
+)
+async def list_member_changes(
+    since: Optional[str] = Query(
+        None, description="Cursor de la consulta anterior (sin cursor, retorna todos los miembros)"
+    ),
+):
+    try:
+        with stage("query"):
+            changes = await member_changes(since)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener los cambios de miembros: {str(e)}"
+        )
+    with stage("serialize"):
+        return ORJSONResponse({
+            **changes,
+            "upserted": [
+                {"id": user_id, **{field: getattr(member, field) for field in MEMBER_FIELDS}}
+                for user_id, member in changes["upserted"]
+            ],
+        }, headers={"Cache-Control": "no-store"})
+
 # POST: Crear un nuevo miembro (endpoint privado)
-@router.post("/", include_in_schema=False)
+@router.post("/", response_model=MemberRecord, include_in_schema=False)
 async def add_member(member_data: dict = Body(...)):
     try:
         result = await create_member(member_data)
@@ -32,8 +139,64 @@ async def add_member(member_data: dict = Body(...)):
             detail=f"Error al crear el miembro: {str(e)}"
         )
 
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Stream NDJSON que se escribe mientras todavía se lee el cuerpo de la
+    solicitud: no escucha desconexiones con `receive` (eso consumiría el
+    cuerpo); una desconexión se detecta al fallar el envío.
+    Sale con Content-Encoding: identity para que GZipMiddleware no lo
+    comprima: su compresor acumula la salida y las líneas dejarían de llegar
+    una a una.
+    """
+    media_type = "application/x-ndjson"
+
+    def __init__(self, content, headers: Optional[dict] = None, **kwargs):
+        super().__init__(content, headers={"Content-Encoding": "identity", **(headers or {})},
+                         **kwargs)
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def _ndjson_lines(results):
+    async for result in results:
+        yield orjson.dumps(result) + b"\n"
+
+# POST: Crear, actualizar o eliminar miembros en lote (endpoint privado)
+@router.post(
+    "/batch", response_model=BatchResponse, response_model_exclude_none=True,
+    include_in_schema=False
+)
+async def batch_members(request: Request):
+    """
+    Acepta una lista JSON de operaciones ({"op": "create"|"update"|"delete",
+    "id", "data"}) o un stream NDJSON (Content-Type: application/x-ndjson),
+    que se lee y se responde línea a línea. Cada operación tiene su propio
+    estado: un error no corta el resto del lote.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        results = run_batch(iter_ndjson(request.stream()))
+        return NDJSONStreamingResponse(_ndjson_lines(results))
+
+    try:
+        operations = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON inválido")
+    if isinstance(operations, dict):
+        operations = operations.get("operations")
+    if not isinstance(operations, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Se espera una lista de operaciones"
+        )
+    results = [result async for result in run_batch(iter_operations(operations))]
+    results.sort(key=lambda result: result["index"])
+    return {"data": results}
+
 # PATCH: Actualizar un miembro (endpoint privado)
-@router.patch("/{member_id}", include_in_schema=False)
+@router.patch("/{member_id}", response_model=MemberRecord, include_in_schema=False)
 async def modify_member(member_id: str, member_data: dict = Body(...)):
     try:
         result = await update_member(member_id, member_data)
@@ -45,7 +208,7 @@ async def modify_member(member_id: str, member_data: dict = Body(...)):
         )
 
 # DELETE: Eliminar un miembro (endpoint privado)
-@router.delete("/{member_id}", include_in_schema=False)
+@router.delete("/{member_id}", response_model=DetailResponse, include_in_schema=False)
 async def remove_member(member_id: str):
     try:
         result = await delete_member(member_id)
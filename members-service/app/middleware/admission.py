@@ -0,0 +1,62 @@
+# app/middleware/admission.py
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.admission import (
+    ADMISSION_RETRY_AFTER, READ, WRITE, AdmissionController
+)
+
+# Lecturas públicas; el resto de los métodos son escrituras de las rutas privadas
+_READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+# Monitoreo: nunca se descarta (Consul y Prometheus deben ver el servicio bajo carga)
+_EXEMPT_PATHS = frozenset(("/health", "/metrics"))
+# Respuestas que indican que PocketBase no da abasto (ver _raise_pocketbase_error);
+# un 500 por un bug o un 4xx del cliente no son congestión
+_CONGESTION_STATUSES = frozenset((502, 503, 504))
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI puro de control de admisión global. A diferencia del rate
+    limit por IP, acota la concurrencia total del servicio: lo que excede el
+    límite adaptativo y la cola corta recibe un 503 inmediato con Retry-After
+    en lugar de acumularse (ver app/utils/admission.py).
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController = None):
+        self.app = app
+        self.controller = controller or AdmissionController()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in _EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        priority = READ if scope["method"] in _READ_METHODS else WRITE
+        if not await self.controller.acquire(priority):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Servicio sobrecargado. Intente nuevamente en unos segundos."},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Las escrituras (p.ej. un batch en streaming) duran lo que dura su carga:
+            # su latencia no se usa como señal de congestión, solo los errores de PocketBase
+            latency = time.perf_counter() - start if priority == READ else 0.0
+            self.controller.release(latency, congested=status in _CONGESTION_STATUSES)
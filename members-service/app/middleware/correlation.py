@@ -1,27 +1,45 @@
 # app/middleware/correlation.py
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from uuid import uuid4
-from typing import Callable
 
-class CorrelationIdMiddleware(BaseHTTPMiddleware):
+_HEADER = b"x-correlation-id"
+
+class CorrelationIdMiddleware:
     """
     Middleware que gestiona un Correlation ID para cada solicitud.
     Si la solicitud no incluye el header 'X-Correlation-ID', se genera uno nuevo.
     Este ID se añade al objeto request.state y a la respuesta.
+
+    Es un middleware ASGI puro: trabaja sobre `scope` y `send` sin envolver la
+    solicitud ni la respuesta, por lo que no afecta a las respuestas en streaming.
     """
-    
-    async def dispatch(self, request, call_next: Callable):
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Buscar header 'X-Correlation-ID'
-        correlation_id = request.headers.get("X-Correlation-ID")
+        correlation_id = None
+        for name, value in scope["headers"]:
+            if name == _HEADER:
+                correlation_id = value
+                break
         if not correlation_id:
-            correlation_id = str(uuid4())
+            correlation_id = str(uuid4()).encode("latin-1")
         # Guardar el correlation ID en el state para ser usado internamente (por ejemplo, para logs)
-        request.state.correlation_id = correlation_id
-        
-        # Procesar la solicitud
-        response = await call_next(request)
-        # Añadir el correlation ID a la respuesta
-        response.headers["X-Correlation-ID"] = correlation_id
-        return response
+        scope.setdefault("state", {})["correlation_id"] = correlation_id.decode("latin-1")
+
+        async def send_with_correlation_id(message: Message):
+            if message["type"] == "http.response.start":
+                # Añadir el correlation ID a la respuesta (reemplazando uno previo)
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != _HEADER]
+                headers.append((_HEADER, correlation_id))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_correlation_id)
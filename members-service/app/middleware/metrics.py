@@ -0,0 +1,42 @@
+# app/middleware/metrics.py
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro que registra la duración de cada solicitud por
+    método, ruta (la plantilla, p.ej. /members/{member_id}) y estado, y las
+    solicitudes en curso.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # FastAPI deja la ruta resuelta en el scope; sin ruta no se usa el path crudo
+            route = scope.get("route")
+            HTTP_REQUESTS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
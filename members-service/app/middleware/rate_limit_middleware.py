@@ -1,48 +1,85 @@
 # app/middleware/rate_limit_middleware.py
 
-import time
-from typing import Callable
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+import math
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+from app.utils.metrics import register_stats
+from app.utils.rate_limiter import (
+    RATE_LIMIT_ALGORITHM, RATE_LIMIT_BACKEND, build_store, resolve_client_ip
+)
+
+_RATE_LIMIT_HEADERS = frozenset(
+    (b"ratelimit-limit", b"ratelimit-remaining", b"ratelimit-reset")
+)
+
+class RateLimitMiddleware:
     """
     Middleware para limitar el número de solicitudes de cada cliente (por IP)
     en una ventana de tiempo específica. Si se excede el límite, se responde con
     un error 429 (Too Many Requests).
+
+    El conteo usa token bucket o ventana deslizante aproximada (O(1) y memoria
+    constante por cliente) sobre un almacenamiento en memoria acotado o un
+    SQLite local compartido entre workers (ver app/utils/rate_limiter.py).
+    Es un middleware ASGI puro que solo agrega headers al mensaje de inicio.
     """
     
-    def __init__(self, app, max_requests: int = 100, window_seconds: int = 60):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, max_requests: int = 100, window_seconds: int = 60,
+                 algorithm: str = RATE_LIMIT_ALGORITHM, backend: str = RATE_LIMIT_BACKEND):
+        self.app = app
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.clients = {}  # Diccionario para llevar la cuenta: {ip: [timestamps]}
+        self.store = build_store(max_requests, window_seconds, algorithm, backend)
+        register_stats("rate_limit", self.store.stats,
+                       counters=("allowed", "limited"), gauges=("clients",))
     
-    async def dispatch(self, request: Request, call_next: Callable):
-        client_ip = request.client.host  # Obtener la IP del cliente
-        current_time = time.time()
-        
-        # Inicializa la lista de tiempos si la IP no está registrada
-        if client_ip not in self.clients:
-            self.clients[client_ip] = []
-        
-        # Eliminar solicitudes que superan la ventana de tiempo
-        self.clients[client_ip] = [
-            timestamp for timestamp in self.clients[client_ip]
-            if timestamp > current_time - self.window_seconds
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # IP del cliente real (X-Real-IP si la conexión viene del gateway)
+        real_ip = forwarded_for = None
+        for name, value in scope["headers"]:
+            if name == b"x-real-ip":
+                real_ip = value.decode("latin-1")
+            elif name == b"x-forwarded-for":
+                forwarded_for = value.decode("latin-1")
+        client = scope.get("client")
+        client_ip = resolve_client_ip(client[0] if client else None, real_ip, forwarded_for)
+
+        if self.store.blocking:
+            decision = await run_in_threadpool(self.store.hit, client_ip)
+        else:
+            decision = self.store.hit(client_ip)
+
+        headers = [
+            (b"ratelimit-limit", str(decision.limit).encode()),
+            (b"ratelimit-remaining", str(decision.remaining).encode()),
+            (b"ratelimit-reset", str(math.ceil(decision.reset)).encode()),
         ]
-        
         # Verificar si se excede el límite
-        if len(self.clients[client_ip]) >= self.max_requests:
-            return JSONResponse(
+        if not decision.allowed:
+            response = JSONResponse(
                 status_code=429,
-                content={"detail": "Rate limit exceeded. Please try again later."}
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers={
+                    **{k.decode(): v.decode() for k, v in headers},
+                    "Retry-After": str(max(1, math.ceil(decision.retry_after))),
+                }
             )
-        
-        # Registrar la nueva solicitud
-        self.clients[client_ip].append(current_time)
-        
+            await response(scope, receive, send)
+            return
+
+        async def send_with_rate_limit_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    (k, v) for k, v in message.get("headers", [])
+                    if k.lower() not in _RATE_LIMIT_HEADERS
+                ] + headers
+            await send(message)
+
         # Procesar la solicitud
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send_with_rate_limit_headers)
@@ -0,0 +1,93 @@
+# app/models/member.py
+from dataclasses import dataclass, fields
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+@dataclass(frozen=True, slots=True)
+class Member:
+    """
+    Información pública de un miembro. Inmutable y con __slots__: la proyección
+    guarda miles de estas instancias y orjson las serializa sin pasar por dicts.
+    """
+    perfil: str
+    nombre: str
+    rol: str
+    capitulo: str
+    anio_ingreso: str
+
+
+# Campos públicos de un miembro (en el orden en que se serializan)
+MEMBER_FIELDS = tuple(field.name for field in fields(Member))
+
+
+# --- Modelos de respuesta (esquema OpenAPI) -------------------------------------
+
+class MemberItem(BaseModel):
+    """
+    Miembro de un listado. Sin `fields` vienen todos los campos; con `fields`
+    solo los pedidos, por eso ninguno es obligatorio en el esquema.
+    """
+    perfil: Optional[str] = None
+    nombre: Optional[str] = None
+    rol: Optional[str] = None
+    capitulo: Optional[str] = None
+    anio_ingreso: Optional[str] = None
+
+
+class MembersPageResponse(BaseModel):
+    data: List[MemberItem]
+    page: int
+    perPage: int
+    totalItems: int
+    totalPages: int
+    next: Optional[str] = None
+
+
+class MemberChange(BaseModel):
+    id: str
+    perfil: str
+    nombre: str
+    rol: str
+    capitulo: str
+    anio_ingreso: str
+
+
+class MemberChangesResponse(BaseModel):
+    cursor: str
+    reset: bool
+    upserted: List[MemberChange]
+    deleted: List[str]
+
+
+class MemberRecord(BaseModel):
+    """
+    Registro de la colección usuario tal como lo retorna PocketBase.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    id: str
+    nombres: str = ""
+    apellidos: str = ""
+    rol: str = ""
+    semestre_ingreso: str = ""
+    created: str = ""
+    updated: str = ""
+
+
+class DetailResponse(BaseModel):
+    detail: str
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: int
+    op: Optional[str] = None
+    id: Optional[str] = None
+    data: Optional[dict] = None
+    error: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    data: List[BatchItemResult]
@@ -0,0 +1,137 @@
+# app/services/member_batch.py
+import asyncio
+import json
+import os
+from typing import AsyncIterable, AsyncIterator, Iterable, Union
+
+from fastapi import HTTPException, status
+
+from app.services import members_service
+from app.utils.http_client import get_client
+
+# Operaciones de un lote que se ejecutan a la vez contra PocketBase
+BATCH_CONCURRENCY = int(os.getenv("MEMBERS_BATCH_CONCURRENCY", "8"))
+# Largo máximo de una línea NDJSON (bytes)
+BATCH_MAX_LINE = int(os.getenv("MEMBERS_BATCH_MAX_LINE", "65536"))
+
+OPERATIONS = ("create", "update", "delete")
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Union[dict, ValueError]]:
+    """
+    Lee un cuerpo NDJSON a medida que llega y retorna un objeto por línea. Las
+    líneas inválidas se retornan como ValueError para reportarlas en su
+    posición sin cortar el resto del lote.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        if skipping:
+            # Se descarta el resto de una línea demasiado larga
+            _, newline, chunk = chunk.partition(b"\n")
+            if not newline:
+                continue
+            skipping = False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+        if len(buffer) > BATCH_MAX_LINE:
+            yield ValueError(f"Línea de más de {BATCH_MAX_LINE} bytes")
+            buffer = b""
+            skipping = True
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Union[dict, ValueError]:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"JSON inválido: {e}")
+
+
+async def iter_operations(operations: Iterable) -> AsyncIterator:
+    for operation in operations:
+        yield operation
+
+
+def _validate(operation) -> str:
+    """
+    Valida una operación y retorna su tipo; lanza ValueError si no es válida.
+    """
+    if isinstance(operation, ValueError):
+        raise operation
+    if not isinstance(operation, dict):
+        raise ValueError("Cada operación debe ser un objeto JSON")
+    op = operation.get("op")
+    if op not in OPERATIONS:
+        raise ValueError(f"Operación desconocida: {op!r} (se espera {', '.join(OPERATIONS)})")
+    if op != "create" and not operation.get("id"):
+        raise ValueError(f"La operación '{op}' requiere 'id'")
+    if op != "delete" and not isinstance(operation.get("data"), dict):
+        raise ValueError(f"La operación '{op}' requiere 'data' (objeto)")
+    return op
+
+
+async def _run_operation(client, position: int, operation) -> dict:
+    """
+    Ejecuta una operación y retorna su resultado; nunca lanza, el error queda
+    en el resultado de ese ítem.
+    """
+    result = {"index": position}
+    try:
+        op = _validate(operation)
+    except ValueError as e:
+        result.update(status=status.HTTP_400_BAD_REQUEST, error=str(e))
+        return result
+
+    result.update(op=op, id=operation.get("id"))
+    try:
+        if op == "create":
+            record = await members_service._create_member_record(client, operation["data"])
+            result.update(id=record.get("id"), status=status.HTTP_200_OK, data=record)
+        elif op == "update":
+            record = await members_service._update_member_record(
+                client, operation["id"], operation["data"]
+            )
+            result.update(status=status.HTTP_200_OK, data=record)
+        else:
+            await members_service._delete_member_record(client, operation["id"])
+            result.update(status=status.HTTP_204_NO_CONTENT)
+    except Exception as e:
+        try:
+            members_service._raise_pocketbase_error(e)
+        except HTTPException as he:
+            result.update(status=he.status_code, error=he.detail)
+    return result
+
+
+async def run_batch(operations: AsyncIterable,
+                    concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[dict]:
+    """
+    Ejecuta las operaciones con a lo sumo `concurrency` en vuelo sobre el
+    cliente y el token compartidos, y retorna cada resultado apenas termina
+    (no necesariamente en orden; cada uno trae su `index`). Las operaciones se
+    leen de a poco: un lote grande nunca está completo en memoria.
+    """
+    client = get_client()
+    pending = set()
+    position = 0
+    try:
+        async for operation in operations:
+            pending.add(asyncio.create_task(_run_operation(client, position, operation)))
+            position += 1
+            if len(pending) >= concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # Si el cliente se desconecta se cancelan las operaciones que aún no terminaron
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,561 @@
+# app/services/member_projection.py
+import base64
+import binascii
+import itertools
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from app.models.member import Member
+
+# Versiones únicas en el proceso: una resincronización nunca repite la versión de otro índice
+_versions = itertools.count(1)
+# Bajas que se recuerdan para /members/changes; los cursores anteriores a la
+# más vieja descartada reciben la lista completa
+TOMBSTONE_LIMIT = int(os.getenv("MEMBERS_TOMBSTONE_LIMIT", "10000"))
+# Campos de usuario que usa la proyección; el resto (correos, teléfono) no se
+# guarda en memoria ni en el snapshot
+USER_FIELDS = ("id", "nombres", "apellidos", "semestre_ingreso", "rol", "updated")
+
+
+def _first_expanded(record: dict, field: str) -> Optional[dict]:
+    """
+    Retorna el registro expandido de una relación (el primero si es múltiple).
+    """
+    expanded = (record.get("expand") or {}).get(field)
+    if isinstance(expanded, list):
+        expanded = expanded[0] if expanded else None
+    return expanded or None
+
+
+def rol_name_of(user: dict) -> str:
+    """
+    Nombre del rol a partir del usuario con 'rol' expandido.
+    """
+    rol_expanded = _first_expanded(user, "rol")
+    return rol_expanded.get("rol", "Miembro") if rol_expanded else "Miembro"
+
+
+def capitulo_name_of(rel: Optional[dict]) -> str:
+    """
+    Nombre del capítulo a partir de una relación usuario_capitulo con 'capitulo' expandido.
+    """
+    if not rel:
+        return "N/A"
+    cap_expanded = _first_expanded(rel, "capitulo")
+    return cap_expanded.get("capitulo", "N/A") if cap_expanded else "N/A"
+
+
+def relation_ids(value) -> list:
+    """
+    Normaliza el valor de un campo relación (simple o múltiple) a una lista de ids.
+    """
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def build_member(user: dict, rol_name: str, capitulo_name: str) -> Member:
+    """
+    Construye la información pública de un miembro.
+    """
+    nombres = user.get("nombres", "")
+    apellidos = user.get("apellidos", "")
+
+    # Extraer año de ingreso a partir del campo 'semestre_ingreso'
+    semestre = user.get("semestre_ingreso", "")
+    anio_ingreso = semestre.split("-")[-1] if "-" in semestre else semestre
+
+    # Construir las iniciales a partir de nombres y apellidos
+    initials = ""
+    if nombres:
+        initials += nombres[0].upper()
+    if apellidos:
+        initials += apellidos[0].upper()
+    full_name = f"{nombres} {apellidos}".strip()
+
+    return Member(
+        perfil=initials or "NA",
+        nombre=full_name,
+        rol=rol_name,
+        capitulo=capitulo_name,
+        anio_ingreso=anio_ingreso,
+    )
+
+
+def _without_expand(record: dict) -> dict:
+    return {key: value for key, value in record.items() if key != "expand"}
+
+
+def _projected_user(user: dict) -> dict:
+    return {field: user[field] for field in USER_FIELDS if field in user}
+
+
+def _pocketbase_now() -> str:
+    """
+    Fecha actual en el formato de 'updated' de PocketBase ('2025-04-06 05:30:42.369Z').
+    """
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "Z"
+
+
+def _after(timestamp: str) -> str:
+    """
+    El timestamp de PocketBase siguiente (1 ms después).
+    """
+    moment = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%fZ") + timedelta(milliseconds=1)
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "Z"
+
+
+def encode_cursor(lineage: str, stamp: str) -> str:
+    return base64.urlsafe_b64encode(f"{lineage}|{stamp}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, str]]:
+    """
+    (linaje, timestamp) de un cursor de /members/changes; None si no es válido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    lineage, sep, stamp = raw.partition("|")
+    return (lineage, stamp) if sep else None
+
+
+class _IssuedCursor:
+    """
+    Mayor timestamp entregado en un cursor; lo comparten los índices sucesivos
+    del mismo linaje para que ningún cambio nuevo quede por debajo.
+    """
+
+    def __init__(self, value: str = ""):
+        self.value = value
+
+
+class MemberIndex:
+    """
+    Proyección de miembros indexada por id de usuario.
+
+    Guarda los datos normalizados (usuarios, nombres de roles y capítulos y
+    relaciones usuario_capitulo) para poder insertar, actualizar o quitar un
+    registro de cualquiera de esas colecciones re-proyectando solo los
+    miembros afectados. Conserva el orden en que PocketBase entrega los registros.
+    """
+
+    def __init__(self):
+        self._members = {}
+        self._users = {}
+        self._rol_names = {}
+        self._cap_names = {}
+        self._rels = {}
+        self._rels_by_user = {}
+        self._list = None
+        self._field_indexes = {}
+        # Cambia con cada modificación; sirve para detectar nuevas versiones de los datos
+        self.version = next(_versions)
+        # Mayor 'updated' entre los registros de origen (o la hora de la última baja)
+        self.last_modified = ""
+        self._rol_updated = {}
+        self._cap_updated = {}
+        # Historial para /members/changes: timestamp del último cambio de cada
+        # miembro y de cada baja. Los cursores solo valen dentro del mismo
+        # linaje (el índice inicial y los que lo reemplazan vía `follow`)
+        self._stamps = {}
+        self._tombstones = {}
+        self._max_stamp = ""
+        self._issued = _IssuedCursor()
+        self.lineage = uuid.uuid4().hex[:12]
+        # Los cursores anteriores a este timestamp no tienen el historial completo
+        self.horizon = ""
+
+    @classmethod
+    def from_records(cls, users: list, rels: list) -> "MemberIndex":
+        """
+        Construye el índice a partir de los usuarios (con 'rol' expandido) y las
+        relaciones usuario_capitulo (con 'capitulo' expandido).
+        """
+        index = cls()
+        for rel in rels:
+            index._store_relation(rel)
+        for user in users:
+            index._store_user(user)
+            index._project(user.get("id"))
+        return index
+
+    def snapshot(self) -> dict:
+        """
+        Estado normalizado del índice (en orden), para persistirlo y restaurarlo
+        con `from_snapshot`. Copia solo las colecciones: los registros se
+        reemplazan (no se modifican) en cada cambio.
+        """
+        return {
+            "last_modified": self.last_modified,
+            "users": list(self._users.values()),
+            "rels": list(self._rels.values()),
+            "rol_names": dict(self._rol_names),
+            "cap_names": dict(self._cap_names),
+            "rol_updated": dict(self._rol_updated),
+            "cap_updated": dict(self._cap_updated),
+            "changes": {
+                "lineage": self.lineage,
+                "horizon": self.horizon,
+                "issued": self._issued.value,
+                "stamps": dict(self._stamps),
+                "tombstones": dict(self._tombstones),
+            },
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "MemberIndex":
+        index = cls()
+        index._rol_names = dict(data["rol_names"])
+        index._cap_names = dict(data["cap_names"])
+        index._rol_updated = dict(data.get("rol_updated") or {})
+        index._cap_updated = dict(data.get("cap_updated") or {})
+        for rel in data["rels"]:
+            index._rels[rel.get("id")] = rel
+            for rel_user in relation_ids(rel.get("usuario")):
+                index._rels_by_user.setdefault(rel_user, []).append(rel.get("id"))
+        for user in data["users"]:
+            index._users[user.get("id")] = _projected_user(user)
+            index._project(user.get("id"))
+        index.last_modified = data["last_modified"]
+        changes = data.get("changes")
+        if changes:
+            # Se conserva el historial: los cursores previos al reinicio siguen valiendo
+            index.lineage = changes["lineage"]
+            index.horizon = changes["horizon"]
+            index._issued = _IssuedCursor(changes["issued"])
+            index._stamps = dict(changes["stamps"])
+            index._tombstones = dict(changes["tombstones"])
+            index._max_stamp = max([*index._stamps.values(), *index._tombstones.values(), ""])
+        return index
+
+    def follow(self, previous: Optional["MemberIndex"]):
+        """
+        Ajusta `last_modified` de un índice recién cargado que reemplaza a
+        `previous`: nunca retrocede y, si los miembros cambiaron sin un
+        'updated' más nuevo (hubo bajas), pasa a la hora actual.
+        """
+        if previous is None:
+            return
+        self._continue_changes(previous)
+        if self.last_modified > previous.last_modified:
+            return
+        if self.members() != previous.members():
+            self._removed()
+        else:
+            self.last_modified = previous.last_modified
+
+    def _continue_changes(self, previous: "MemberIndex"):
+        """
+        Continúa el historial de cambios de `previous`: los miembros iguales
+        conservan su timestamp, los distintos reciben uno nuevo y los que ya no
+        están quedan como bajas.
+        """
+        fresh = self._stamps
+        self.lineage = previous.lineage
+        self.horizon = previous.horizon
+        self._issued = previous._issued
+        self._tombstones = dict(previous._tombstones)
+        self._stamps = {}
+        self._max_stamp = previous._max_stamp
+        for user_id, member in self._members.items():
+            if previous._members.get(user_id) == member and user_id in previous._stamps:
+                self._stamps[user_id] = previous._stamps[user_id]
+            else:
+                self._stamps[user_id] = self._stamp(fresh.get(user_id, ""))
+            self._tombstones.pop(user_id, None)
+        for user_id in previous._members:
+            if user_id not in self._members:
+                self._tombstone(user_id)
+
+    def changes_since(self, cursor: Optional[str]) -> dict:
+        """
+        Miembros creados o modificados y bajas posteriores a `cursor`, con el
+        cursor para la próxima consulta. Sin cursor, con uno de otro linaje o
+        anterior al historial disponible, retorna todos los miembros (`reset`).
+        """
+        since = None
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is not None and decoded[0] == self.lineage and decoded[1] >= self.horizon:
+            since = decoded[1]
+
+        stamp = max(self._max_stamp, self._issued.value)
+        # Todo cambio posterior recibe un timestamp mayor que el cursor entregado
+        self._issued.value = stamp
+        if since is None:
+            return {
+                "cursor": encode_cursor(self.lineage, stamp),
+                "reset": True,
+                "upserted": list(self._members.items()),
+                "deleted": [],
+            }
+        return {
+            "cursor": encode_cursor(self.lineage, stamp),
+            "reset": False,
+            "upserted": [
+                (user_id, member) for user_id, member in self._members.items()
+                if self._stamps.get(user_id, "") > since
+            ],
+            "deleted": [user_id for user_id, deleted in self._tombstones.items() if deleted > since],
+        }
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._members
+
+    def get(self, user_id: str) -> Optional[Member]:
+        return self._members.get(user_id)
+
+    def members(self) -> list:
+        """
+        Lista de miembros en orden; se reconstruye solo cuando hubo cambios.
+        """
+        if self._list is None:
+            self._list = list(self._members.values())
+        return self._list
+
+    def query(self, capitulo: Optional[str] = None, rol: Optional[str] = None,
+              anio_ingreso: Optional[str] = None, search: Optional[str] = None) -> list:
+        """
+        Miembros que cumplen los filtros de igualdad (capitulo, rol, anio_ingreso)
+        y contienen cada palabra de `search` en el nombre (sin distinguir
+        mayúsculas), en orden.
+        Parte del índice secundario más selectivo en lugar de recorrer todos.
+        """
+        equality = {
+            field: value
+            for field, value in (("capitulo", capitulo), ("rol", rol), ("anio_ingreso", anio_ingreso))
+            if value is not None
+        }
+        if not equality and not search:
+            return self.members()
+        if equality:
+            candidates = min(
+                (self._field_index(field).get(value, []) for field, value in equality.items()),
+                key=len
+            )
+        else:
+            candidates = self.members()
+        needles = search.casefold().split() if search else []
+        return [
+            member for member in candidates
+            if all(getattr(member, field) == value for field, value in equality.items())
+            and all(needle in member.nombre.casefold() for needle in needles)
+        ]
+
+    def _field_index(self, field: str) -> dict:
+        """
+        Índice {valor: [miembros]} de un campo; se construye una vez por versión.
+        """
+        groups = self._field_indexes.get(field)
+        if groups is None:
+            groups = {}
+            for member in self._members.values():
+                groups.setdefault(getattr(member, field), []).append(member)
+            self._field_indexes[field] = groups
+        return groups
+
+    def has_rol(self, rol_id: str) -> bool:
+        return rol_id in self._rol_names
+
+    def has_capitulo(self, capitulo_id: str) -> bool:
+        return capitulo_id in self._cap_names
+
+    def has_relations(self, user_id: str) -> bool:
+        return bool(self._rels_by_user.get(user_id))
+
+    # --- usuario -------------------------------------------------------------
+
+    def upsert_user(self, user: dict):
+        """
+        Inserta un usuario nuevo al final o reemplaza uno existente en su lugar.
+        Si trae 'rol' expandido, también actualiza el nombre del rol.
+        """
+        self._store_user(user)
+        self._project(user.get("id"))
+        self._changed()
+
+    def remove_user(self, user_id: str):
+        self._users.pop(user_id, None)
+        if self._members.pop(user_id, None) is not None:
+            self._removed()
+            self._tombstone(user_id)
+            self._changed()
+
+    # --- usuario_capitulo ------------------------------------------------------
+
+    def upsert_relation(self, rel: dict):
+        """
+        Inserta o actualiza una relación usuario_capitulo y re-proyecta los
+        usuarios afectados (el anterior y el nuevo, si cambió).
+        """
+        previous = self._rels.get(rel.get("id"))
+        affected = set(relation_ids(rel.get("usuario")))
+        if previous and relation_ids(previous.get("usuario")) == relation_ids(rel.get("usuario")):
+            # Mismo usuario: se reemplaza sin perder su posición entre las relaciones
+            self._store_relation(rel, keep_position=True)
+        else:
+            if previous:
+                affected.update(relation_ids(previous.get("usuario")))
+                self._drop_relation(rel.get("id"))
+            self._store_relation(rel)
+        self._reproject(affected)
+
+    def remove_relation(self, rel_id: str):
+        previous = self._rels.get(rel_id)
+        if previous is None:
+            return
+        self._drop_relation(rel_id)
+        self._removed()
+        self._reproject(relation_ids(previous.get("usuario")))
+
+    # --- rol / capitulo --------------------------------------------------------
+
+    def upsert_rol(self, rol: dict):
+        self._seen(rol)
+        self._rol_names[rol.get("id")] = rol.get("rol", "Miembro")
+        self._rol_updated[rol.get("id")] = rol.get("updated") or ""
+        self._reproject(
+            user_id for user_id, user in self._users.items()
+            if rol.get("id") in relation_ids(user.get("rol"))
+        )
+
+    def remove_rol(self, rol_id: str):
+        if self._rol_names.pop(rol_id, None) is not None:
+            self._rol_updated.pop(rol_id, None)
+            self._removed()
+            self._reproject(
+                user_id for user_id, user in self._users.items()
+                if rol_id in relation_ids(user.get("rol"))
+            )
+
+    def upsert_capitulo(self, capitulo: dict):
+        self._seen(capitulo)
+        self._cap_names[capitulo.get("id")] = capitulo.get("capitulo", "N/A")
+        self._cap_updated[capitulo.get("id")] = capitulo.get("updated") or ""
+        self._reproject(self._users_of_capitulo(capitulo.get("id")))
+
+    def remove_capitulo(self, capitulo_id: str):
+        if self._cap_names.pop(capitulo_id, None) is not None:
+            self._cap_updated.pop(capitulo_id, None)
+            self._removed()
+            self._reproject(self._users_of_capitulo(capitulo_id))
+
+    # --- internos ----------------------------------------------------------------
+
+    def _store_user(self, user: dict):
+        rol_expanded = _first_expanded(user, "rol")
+        rol_ids = relation_ids(user.get("rol"))
+        if rol_expanded and (rol_expanded.get("id") or rol_ids):
+            rol_id = rol_expanded.get("id") or rol_ids[0]
+            self._rol_names[rol_id] = rol_expanded.get("rol", "Miembro")
+            self._rol_updated[rol_id] = rol_expanded.get("updated") or ""
+            self._seen(rol_expanded)
+        self._seen(user)
+        self._users[user.get("id")] = _projected_user(user)
+
+    def _store_relation(self, rel: dict, keep_position: bool = False):
+        cap_expanded = _first_expanded(rel, "capitulo")
+        cap_ids = relation_ids(rel.get("capitulo"))
+        if cap_expanded and (cap_expanded.get("id") or cap_ids):
+            capitulo_id = cap_expanded.get("id") or cap_ids[0]
+            self._cap_names[capitulo_id] = cap_expanded.get("capitulo", "N/A")
+            self._cap_updated[capitulo_id] = cap_expanded.get("updated") or ""
+            self._seen(cap_expanded)
+        self._seen(rel)
+        self._rels[rel.get("id")] = _without_expand(rel)
+        if keep_position:
+            return
+        for rel_user in relation_ids(rel.get("usuario")):
+            self._rels_by_user.setdefault(rel_user, []).append(rel.get("id"))
+
+    def _drop_relation(self, rel_id: str):
+        rel = self._rels.pop(rel_id)
+        for rel_user in relation_ids(rel.get("usuario")):
+            rel_ids = self._rels_by_user.get(rel_user, [])
+            if rel_id in rel_ids:
+                rel_ids.remove(rel_id)
+
+    def _users_of_capitulo(self, capitulo_id: str) -> set:
+        return {
+            rel_user
+            for rel in self._rels.values()
+            if capitulo_id in relation_ids(rel.get("capitulo"))
+            for rel_user in relation_ids(rel.get("usuario"))
+        }
+
+    def _project(self, user_id: str):
+        user = self._users.get(user_id)
+        if user is None:
+            return
+        rol_ids = relation_ids(user.get("rol"))
+        rol_name = self._rol_names.get(rol_ids[0], "Miembro") if rol_ids else "Miembro"
+        # Timestamps de los registros de los que sale el miembro
+        sources = [user.get("updated") or ""]
+        if rol_ids:
+            sources.append(self._rol_updated.get(rol_ids[0], ""))
+
+        # La primera relación encontrada para el usuario es la que se usa
+        capitulo_name = "N/A"
+        rel_ids = self._rels_by_user.get(user_id)
+        if rel_ids:
+            rel = self._rels[rel_ids[0]]
+            cap_ids = relation_ids(rel.get("capitulo"))
+            capitulo_name = self._cap_names.get(cap_ids[0], "N/A") if cap_ids else "N/A"
+            sources.append(rel.get("updated") or "")
+            if cap_ids:
+                sources.append(self._cap_updated.get(cap_ids[0], ""))
+
+        member = build_member(user, rol_name, capitulo_name)
+        if self._members.get(user_id) != member or user_id not in self._stamps:
+            self._stamps[user_id] = self._stamp(max(sources))
+            self._tombstones.pop(user_id, None)
+        self._members[user_id] = member
+
+    def _reproject(self, user_ids):
+        changed = False
+        for user_id in user_ids:
+            if user_id in self._users:
+                self._project(user_id)
+                changed = True
+        if changed:
+            self._changed()
+
+    def _seen(self, record: dict):
+        # Los timestamps de PocketBase tienen ancho fijo: se comparan como texto
+        updated = record.get("updated") or ""
+        if updated > self.last_modified:
+            self.last_modified = updated
+
+    def _removed(self):
+        # Una baja no deja un 'updated' en los datos; se toma la hora actual
+        self.last_modified = max(self.last_modified, _pocketbase_now())
+
+    def _stamp(self, updated: str) -> str:
+        """
+        Timestamp de un cambio: el 'updated' de PocketBase, salvo que no supere
+        el último cursor entregado (un cambio que llega tarde, o una baja de
+        relación sin 'updated' nuevo); entonces, justo después del cursor.
+        """
+        issued = self._issued.value
+        stamp = updated if updated > issued else _after(issued) if issued else _pocketbase_now()
+        self._max_stamp = max(self._max_stamp, stamp)
+        return stamp
+
+    def _tombstone(self, user_id: str):
+        self._stamps.pop(user_id, None)
+        self._tombstones[user_id] = self._stamp(_pocketbase_now())
+        if len(self._tombstones) > TOMBSTONE_LIMIT:
+            # Se olvida la baja más vieja: los cursores anteriores reciben la lista completa
+            oldest = next(iter(self._tombstones))
+            self.horizon = max(self.horizon, self._tombstones.pop(oldest))
+
+    def _changed(self):
+        self._list = None
+        self._field_indexes = {}
+        self.version = next(_versions)
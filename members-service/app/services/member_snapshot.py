@@ -0,0 +1,212 @@
+# app/services/member_snapshot.py
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import time
+from typing import Optional
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+from app.services.member_projection import MemberIndex
+from app.services.members_service import members_cache
+from app.utils.cache import StaleWhileRevalidateCache
+
+logger = logging.getLogger("uvicorn.error")
+
+# Archivo con la última proyección buena ("" lo desactiva)
+MEMBERS_SNAPSHOT_PATH = os.getenv("MEMBERS_SNAPSHOT_PATH", "/app/data/members-snapshot.json.gz")
+# Cada cuánto se persiste la proyección si cambió (segundos)
+MEMBERS_SNAPSHOT_INTERVAL = float(os.getenv("MEMBERS_SNAPSHOT_INTERVAL", "60"))
+# Antigüedad máxima de un snapshot para servirlo al arrancar (segundos)
+MEMBERS_SNAPSHOT_MAX_AGE = float(os.getenv("MEMBERS_SNAPSHOT_MAX_AGE", "86400"))
+
+SNAPSHOT_FORMAT = 1
+
+
+def members_digest(members: list) -> str:
+    """
+    Hash del contenido de la proyección (`MemberIndex.members()`): no depende
+    del proceso (a diferencia de `version`), así que sirve para comparar un
+    snapshot con los datos actuales.
+    """
+    return hashlib.sha256(orjson.dumps(members)).hexdigest()[:32]
+
+
+def write_snapshot(path: str, payload: dict):
+    """
+    Escribe el snapshot de forma atómica (archivo temporal + rename): un corte a
+    mitad de escritura nunca deja un snapshot truncado en `path`.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(gzip.compress(orjson.dumps(payload), compresslevel=6, mtime=0))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Optional[dict]:
+    """
+    Lee un snapshot (None si no existe). gzip verifica el CRC: un archivo
+    corrupto lanza una excepción en lugar de restaurar datos a medias.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    payload = orjson.loads(gzip.decompress(raw))
+    if payload.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Formato de snapshot no soportado: {payload.get('format')}")
+    return payload
+
+
+class MemberSnapshotter:
+    """
+    Persiste periódicamente la última proyección de miembros buena y la
+    restaura al arrancar: el servicio responde de inmediato con ella mientras
+    una recarga en segundo plano la valida contra PocketBase. Si PocketBase no
+    responde, la caché sigue sirviendo el snapshot como último valor conocido.
+    """
+
+    def __init__(self, cache: StaleWhileRevalidateCache, path: str = MEMBERS_SNAPSHOT_PATH,
+                 interval: float = MEMBERS_SNAPSHOT_INTERVAL,
+                 max_age: float = MEMBERS_SNAPSHOT_MAX_AGE):
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.restored = False
+        # Resultado de validar el snapshot restaurado: current, changed o failed
+        self.validation: Optional[str] = None
+        self.saves = 0
+        self.errors = 0
+        self._saved_version: Optional[int] = None
+        self._saved_at: Optional[float] = None
+        self._restored_digest: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._validation_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    async def restore(self) -> bool:
+        """
+        Carga el snapshot en la caché (si existe y no supera `max_age`) y lanza
+        su validación en segundo plano.
+        """
+        if not self.enabled or self.cache.has_value:
+            return False
+        try:
+            payload = await run_in_threadpool(read_snapshot, self.path)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"No se pudo leer el snapshot de miembros: {e!r}")
+            return False
+        if payload is None:
+            return False
+        age = time.time() - payload["saved_at"]
+        if age > self.max_age:
+            logger.info(f"Snapshot de miembros descartado por antigüedad ({age:.0f}s)")
+            return False
+
+        index = MemberIndex.from_snapshot(payload["index"])
+        # Con su antigüedad real (al menos `ttl`): se sirve de inmediato como
+        # STALE, nunca como HIT ni esperando a PocketBase, hasta que la
+        # validación lo reemplace o cumpla `max_age`
+        self.cache.set(index, age=max(age, self.cache.ttl), stale_for=self.max_age - age)
+        self.restored = True
+        self._restored_digest = payload["digest"]
+        self._saved_version = index.version
+        self._saved_at = payload["saved_at"]
+        logger.info(f"Proyección de miembros restaurada desde el snapshot ({len(index)} miembros, "
+                    f"{age:.0f}s de antigüedad)")
+        self._validation_task = asyncio.create_task(self._validate(self.cache.refresh()))
+        return True
+
+    async def _validate(self, refresh: asyncio.Task):
+        try:
+            await refresh
+        except Exception:
+            self.validation = "failed"
+            logger.warning("No se pudo validar el snapshot de miembros; se sirve como último valor conocido")
+            return
+        index = self.cache.peek()
+        digest = await run_in_threadpool(members_digest, index.members()) if index is not None else None
+        self.validation = "current" if digest == self._restored_digest else "changed"
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._validation_task is not None:
+            self._validation_task.cancel()
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Último guardado al apagar, para que el próximo arranque parta de lo más nuevo
+        await self.save()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def save(self) -> bool:
+        """
+        Persiste la proyección en caché si cambió desde el último guardado.
+        """
+        index = self.cache.peek()
+        if index is None or index.version == self._saved_version:
+            return False
+        # El estado se copia en el event loop; el hash, la serialización y la
+        # escritura, fuera
+        version = index.version
+        saved_at = time.time()
+        members = index.members()
+        payload = {
+            "format": SNAPSHOT_FORMAT,
+            "saved_at": saved_at,
+            "version": version,
+            "index": index.snapshot(),
+        }
+
+        def digest_and_write():
+            payload["digest"] = members_digest(members)
+            write_snapshot(self.path, payload)
+
+        try:
+            await run_in_threadpool(digest_and_write)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"No se pudo guardar el snapshot de miembros: {e!r}")
+            return False
+        self.saves += 1
+        self._saved_version = version
+        self._saved_at = saved_at
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "restored": self.restored,
+            "validation": self.validation,
+            "age": round(time.time() - self._saved_at, 3) if self._saved_at else None,
+            "saves": self.saves,
+            "errors": self.errors,
+        }
+
+
+member_snapshotter = MemberSnapshotter(members_cache)
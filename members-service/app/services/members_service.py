@@ -1,116 +1,299 @@
 # app/services/members_service.py
 
+import asyncio
+import logging
 import os
+from typing import NamedTuple, Optional, Tuple
+
 import httpx
 from fastapi import HTTPException, status
 
+from app.services import sqlite_backend
+from app.services.member_projection import (
+    MemberIndex, relation_ids
+)
+from app.utils.cache import CacheResult, StaleWhileRevalidateCache
+from app.utils.http_client import get_client
+from app.utils.metrics import stage, upstream_call
+from app.utils.pocketbase_auth import AdminTokenManager
+from app.utils.resilience import CircuitOpenError, ResilientCaller
+
+logger = logging.getLogger("uvicorn.error")
+
 POCKETBASE_URL = os.getenv("POCKETBASE_URL")
 ADMIN_EMAIL = os.getenv("POCKETBASE_ADMIN_EMAIL")
 ADMIN_PASSWORD = os.getenv("POCKETBASE_ADMIN_PASSWORD")
+# Máximo de registros por página que acepta PocketBase
+PER_PAGE = int(os.getenv("POCKETBASE_PER_PAGE", "500"))
+# Páginas que se piden en paralelo al recorrer una colección
+PAGE_CONCURRENCY = int(os.getenv("POCKETBASE_PAGE_CONCURRENCY", "4"))
+# 'skipTotal' evita el COUNT en PocketBase >= 0.20 (las versiones previas lo ignoran)
+SKIP_TOTAL = os.getenv("POCKETBASE_SKIP_TOTAL", "false").lower() in ("1", "true", "yes")
+
+# Caché de la lista de miembros (segundos)
+MEMBERS_CACHE_ENABLED = os.getenv("MEMBERS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMBERS_CACHE_TTL = float(os.getenv("MEMBERS_CACHE_TTL", "30"))
+MEMBERS_CACHE_STALE_TTL = float(os.getenv("MEMBERS_CACHE_STALE_TTL", "300"))
+MEMBERS_CACHE_STALE_IF_SLOW = float(os.getenv("MEMBERS_CACHE_STALE_IF_SLOW", "2"))
+
+# Token de administrador compartido entre todas las llamadas del servicio
+token_manager = AdminTokenManager(POCKETBASE_URL, ADMIN_EMAIL, ADMIN_PASSWORD)
+# Plazos, reintentos, circuit breaker y hedging de todas las llamadas a PocketBase
+pocketbase_calls = ResilientCaller()
 
 async def _admin_auth_client(client: httpx.AsyncClient) -> dict:
     """
-    Autentica como administrador y retorna el header con token.
+    Retorna el header con el token de administrador (cacheado).
+    """
+    with stage("auth"):
+        return await token_manager.headers(client)
+
+async def _request(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Envía una petición autenticada a PocketBase a través de `pocketbase_calls`.
+    Si responde 401 (token revocado o vencido), renueva el token y reintenta
+    una sola vez.
     """
-    auth_response = await client.post(
-        f"{POCKETBASE_URL}/api/admins/auth-with-password",
-        json={"identity": ADMIN_EMAIL, "password": ADMIN_PASSWORD}
+    async def send_once(headers: dict) -> httpx.Response:
+        with upstream_call(method, url) as call:
+            res = await client.request(method, url, headers=headers, **kwargs)
+            call["status"] = res.status_code
+            return res
+
+    async def send() -> httpx.Response:
+        headers = await _admin_auth_client(client)
+        res = await send_once(headers)
+        if res.status_code == 401:
+            token_manager.invalidate(headers["Authorization"].removeprefix("Bearer "))
+            headers = await _admin_auth_client(client)
+            res = await send_once(headers)
+        return res
+
+    return await pocketbase_calls.call(method, send)
+
+async def _fetch_page(
+    client: httpx.AsyncClient, collection: str, params: dict, page: int
+) -> dict:
+    """
+    Obtiene una página de registros de una colección.
+    """
+    query = {**params, "page": page, "perPage": PER_PAGE}
+    if SKIP_TOTAL:
+        query["skipTotal"] = "true"
+    res = await _request(
+        client, "GET", f"{POCKETBASE_URL}/api/collections/{collection}/records",
+        params=query
     )
-    auth_response.raise_for_status()
-    admin_token = auth_response.json().get("token")
-    return {"Authorization": f"Bearer {admin_token}"}
+    res.raise_for_status()
+    return res.json()
 
-async def get_all_members():
+async def _fetch_all_records(
+    client: httpx.AsyncClient, collection: str, params: dict = None,
+    concurrency: int = PAGE_CONCURRENCY
+) -> list:
     """
-    Obtiene todos los usuarios (miembros) y sus relaciones.
+    Obtiene todos los registros de una colección. Se pide la primera página
+    y luego el resto en paralelo (hasta `concurrency` a la vez).
+    Retorna los registros en el mismo orden en que los entrega PocketBase.
     """
+    params = params or {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(page: int) -> dict:
+        async with semaphore:
+            return await _fetch_page(client, collection, params, page)
+
+    first = await _fetch_page(client, collection, params, 1)
+    items = list(first.get("items", []))
+    # PocketBase puede recortar perPage a su máximo; se usa el valor devuelto
+    per_page = first.get("perPage") or PER_PAGE
+
+    if not SKIP_TOTAL:
+        pages = await asyncio.gather(
+            *(fetch(page) for page in range(2, first.get("totalPages", 1) + 1))
+        )
+        for data in pages:
+            items.extend(data.get("items", []))
+        return items
+
+    # Sin total conocido: se piden tandas de páginas hasta encontrar una incompleta
+    if len(items) < per_page:
+        return items
+    next_page = 2
+    while True:
+        pages = await asyncio.gather(
+            *(fetch(page) for page in range(next_page, next_page + max(1, concurrency)))
+        )
+        for data in pages:
+            page_items = data.get("items", [])
+            items.extend(page_items)
+            if len(page_items) < per_page:
+                return items
+        next_page += max(1, concurrency)
+
+async def _load_member_index() -> MemberIndex:
+    """
+    Obtiene todos los usuarios (miembros) y sus relaciones y construye la
+    proyección indexada por id de usuario.
+    """
+    if sqlite_backend.MEMBERS_READ_BACKEND == "sqlite":
+        # Lectura directa del data.db (una sola consulta); ante cualquier
+        # error se vuelve a la API HTTP. Las escrituras siempre van por la API.
+        try:
+            with stage("fetch_sqlite"):
+                users_items, rel_items = await sqlite_backend.fetch_member_records()
+            with stage("transform"):
+                index = MemberIndex.from_records(users_items, rel_items)
+                index.follow(members_cache.peek())
+            return index
+        except Exception as e:
+            logger.warning(f"Lectura SQLite fallida, se usa la API de PocketBase: {e!r}")
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = await _admin_auth_client(client)
+        client = get_client()
+
+        # Obtener todos los usuarios (todas las páginas) expandiendo el rol
+        with stage("fetch_users"):
+            users_items = await _fetch_all_records(client, "usuario", {"expand": "rol"})
 
-            # Obtener todos los usuarios expandiendo el rol
-            res_users = await client.get(
-                f"{POCKETBASE_URL}/api/collections/usuario/records?expand=rol",
-                headers=headers
+        # Obtener todas las relaciones usuario-capítulo en bloque (en lugar de
+        # una consulta por usuario) y unirlas en memoria por id de usuario
+        with stage("fetch_relations"):
+            rel_items = await _fetch_all_records(
+                client, "usuario_capitulo", {"expand": "capitulo"}
             )
-            res_users.raise_for_status()
-            data_users = res_users.json()
-            users_items = data_users.get("items", [])
-
-            final_data = []
-
-            for user in users_items:
-                user_id = user.get("id")
-                nombres = user.get("nombres", "")
-                apellidos = user.get("apellidos", "")
-
-                # Extraer el rol expandido
-                rol_expanded = user.get("expand", {}).get("rol")
-                if isinstance(rol_expanded, list) and rol_expanded:
-                    rol_expanded = rol_expanded[0]
-                rol_name = rol_expanded.get("rol", "Miembro") if rol_expanded else "Miembro"
-
-                # Extraer año de ingreso a partir del campo 'semestre_ingreso'
-                semestre = user.get("semestre_ingreso", "")
-                anio_ingreso = semestre.split("-")[-1] if "-" in semestre else semestre
-
-                # Consultar la colección intermedia 'usuario_capitulo' para obtener el capítulo
-                url_user_caps = (
-                    f"{POCKETBASE_URL}/api/collections/usuario_capitulo/records"
-                    f"?filter=(usuario='{user_id}')&expand=capitulo"
-                )
-                res_caps = await client.get(url_user_caps, headers=headers)
-                res_caps.raise_for_status()
-                data_caps = res_caps.json()
-                cap_items = data_caps.get("items", [])
-
-                capitulo_name = "N/A"
-                if cap_items:
-                    first_rel = cap_items[0]
-                    cap_expanded = first_rel.get("expand", {}).get("capitulo")
-                    if isinstance(cap_expanded, list) and cap_expanded:
-                        cap_expanded = cap_expanded[0]
-                    capitulo_name = cap_expanded.get("capitulo", "N/A") if cap_expanded else "N/A"
-
-                # Construir las iniciales a partir de nombres y apellidos
-                initials = ""
-                if nombres:
-                    initials += nombres[0].upper()
-                if apellidos:
-                    initials += apellidos[0].upper()
-                full_name = f"{nombres} {apellidos}".strip()
-
-                member_info = {
-                    "perfil": initials or "NA",
-                    "nombre": full_name,
-                    "rol": rol_name,
-                    "capitulo": capitulo_name,
-                    "anio_ingreso": anio_ingreso
-                }
-                final_data.append(member_info)
 
-            return final_data
+        with stage("transform"):
+            index = MemberIndex.from_records(users_items, rel_items)
+            index.follow(members_cache.peek())
+        return index
+
+    except Exception as e:
+        _raise_pocketbase_error(e)
 
-    except httpx.ConnectError:
+def _raise_pocketbase_error(error: Exception):
+    """
+    Traduce un error al consultar PocketBase a la HTTPException correspondiente.
+    """
+    if isinstance(error, HTTPException):
+        raise error
+    if isinstance(error, CircuitOpenError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PocketBase no está disponible por el momento",
+            headers={"Retry-After": str(max(1, round(error.retry_after)))}
+        )
+    if isinstance(error, httpx.ConnectError):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="No se pudo conectar con PocketBase"
         )
-    except httpx.TimeoutException:
+    if isinstance(error, httpx.TimeoutException):
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
             detail="Tiempo de espera agotado al consultar PocketBase"
         )
-    except httpx.HTTPStatusError as http_err:
+    if isinstance(error, httpx.HTTPStatusError):
         raise HTTPException(
-            status_code=http_err.response.status_code,
-            detail=f"Error al consultar PocketBase: {http_err.response.text}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error inesperado: {str(e)}"
+            status_code=error.response.status_code,
+            detail=f"Error al consultar PocketBase: {error.response.text}"
         )
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Error inesperado: {str(error)}"
+    )
+
+async def get_all_members():
+    """
+    Obtiene todos los usuarios (miembros) y sus relaciones.
+    """
+    index = await _load_member_index()
+    return index.members()
+
+async def _fetch_record(client: httpx.AsyncClient, collection: str, record_id: str) -> Optional[dict]:
+    """
+    Obtiene un registro por id (None si no existe).
+    """
+    res = await _request(
+        client, "GET", f"{POCKETBASE_URL}/api/collections/{collection}/records/{record_id}"
+    )
+    if res.status_code == 404:
+        return None
+    res.raise_for_status()
+    return res.json()
+
+async def _fetch_user_relations(client: httpx.AsyncClient, member_id: str) -> list:
+    """
+    Obtiene las relaciones usuario_capitulo de un solo usuario (con 'capitulo' expandido).
+    """
+    return await _fetch_all_records(
+        client, "usuario_capitulo",
+        {"filter": f"(usuario='{member_id}')", "expand": "capitulo"}
+    )
+
+async def _apply_member_write(client: httpx.AsyncClient, record: dict, created: bool = False):
+    """
+    Aplica la escritura de un usuario sobre la proyección en caché, re-resolviendo
+    solo su rol (expandido en la respuesta) y su capítulo.
+    """
+    index = members_cache.peek()
+    if index is None:
+        return
+    member_id = record.get("id")
+    # Un usuario recién creado aún no puede tener relaciones usuario_capitulo;
+    # uno ya indexado conserva las suyas. Solo se consultan si es desconocido.
+    if not created and member_id not in index:
+        for rel in await _fetch_user_relations(client, member_id):
+            index.upsert_relation(rel)
+    index.upsert_user(record)
+    members_cache.touch()
+
+def _without_expand(record: dict) -> dict:
+    """
+    Quita el 'expand' pedido para la proyección y retorna el registro como lo entrega PocketBase.
+    """
+    return {key: value for key, value in record.items() if key != "expand"}
+
+async def _create_member_record(client: httpx.AsyncClient, member_data: dict) -> dict:
+    """
+    Crea el usuario en PocketBase y lo agrega a la proyección en caché.
+    """
+    res = await _request(
+        client, "POST", f"{POCKETBASE_URL}/api/collections/usuario/records",
+        params={"expand": "rol"}, json=member_data
+    )
+    res.raise_for_status()
+    record = res.json()
+    await _apply_member_write(client, record, created=True)
+    return _without_expand(record)
+
+async def _update_member_record(client: httpx.AsyncClient, member_id: str, member_data: dict) -> dict:
+    """
+    Actualiza el usuario en PocketBase y lo re-proyecta en la caché.
+    """
+    res = await _request(
+        client, "PATCH",
+        f"{POCKETBASE_URL}/api/collections/usuario/records/{member_id}",
+        params={"expand": "rol"}, json=member_data
+    )
+    res.raise_for_status()
+    record = res.json()
+    await _apply_member_write(client, record)
+    return _without_expand(record)
+
+async def _delete_member_record(client: httpx.AsyncClient, member_id: str):
+    """
+    Elimina el usuario en PocketBase y lo quita de la proyección en caché.
+    """
+    res = await _request(
+        client, "DELETE",
+        f"{POCKETBASE_URL}/api/collections/usuario/records/{member_id}"
+    )
+    res.raise_for_status()
+    index = members_cache.peek()
+    if index is not None:
+        index.remove_user(member_id)
+        members_cache.touch()
 
 async def create_member(member_data: dict):
     """
@@ -118,15 +301,7 @@ async def create_member(member_data: dict):
     `member_data` debe tener la información necesaria (p.ej.: nombres, apellidos, semestre_ingreso, etc.)
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = await _admin_auth_client(client)
-            res = await client.post(
-                f"{POCKETBASE_URL}/api/collections/usuario/records",
-                json=member_data,
-                headers=headers
-            )
-            res.raise_for_status()
-            return res.json()
+        return await _create_member_record(get_client(), member_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -138,15 +313,7 @@ async def update_member(member_id: str, member_data: dict):
     Actualiza la información de un miembro en PocketBase.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = await _admin_auth_client(client)
-            res = await client.patch(
-                f"{POCKETBASE_URL}/api/collections/usuario/records/{member_id}",
-                json=member_data,
-                headers=headers
-            )
-            res.raise_for_status()
-            return res.json()
+        return await _update_member_record(get_client(), member_id, member_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -158,16 +325,249 @@ async def delete_member(member_id: str):
     Elimina un miembro en PocketBase.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = await _admin_auth_client(client)
-            res = await client.delete(
-                f"{POCKETBASE_URL}/api/collections/usuario/records/{member_id}",
-                headers=headers
-            )
-            res.raise_for_status()
-            return {"detail": "Miembro eliminado"}
+        await _delete_member_record(get_client(), member_id)
+        return {"detail": "Miembro eliminado"}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error eliminando el miembro: {str(e)}"
         )
+
+# Caché de la proyección de miembros que sirve GET /members
+members_cache = StaleWhileRevalidateCache(
+    _load_member_index,
+    ttl=MEMBERS_CACHE_TTL,
+    stale_ttl=MEMBERS_CACHE_STALE_TTL,
+    stale_if_slow=MEMBERS_CACHE_STALE_IF_SLOW,
+)
+
+async def get_cached_members() -> CacheResult:
+    """
+    Retorna la proyección de miembros (MemberIndex) desde la caché,
+    recargándola si hace falta.
+    """
+    return await members_cache.get()
+
+async def resync_members() -> MemberIndex:
+    """
+    Reconstruye la proyección completa desde PocketBase y la deja en la caché.
+    """
+    index = await _load_member_index()
+    members_cache.set(index)
+    return index
+
+async def apply_realtime_event(collection: str, action: str, record: dict):
+    """
+    Aplica un evento create/update/delete de PocketBase sobre la proyección en
+    caché. Los roles o capítulos que aún no se conocen se consultan por id.
+    """
+    index = members_cache.peek()
+    if index is None:
+        return
+    client = get_client()
+    record_id = record.get("id")
+
+    if collection == "usuario":
+        if action == "delete":
+            index.remove_user(record_id)
+        else:
+            rol_ids = relation_ids(record.get("rol"))
+            if rol_ids and not index.has_rol(rol_ids[0]):
+                rol = await _fetch_record(client, "rol", rol_ids[0])
+                if rol is not None:
+                    index.upsert_rol(rol)
+            index.upsert_user(record)
+    elif collection == "usuario_capitulo":
+        if action == "delete":
+            index.remove_relation(record_id)
+        else:
+            cap_ids = relation_ids(record.get("capitulo"))
+            if cap_ids and not index.has_capitulo(cap_ids[0]):
+                capitulo = await _fetch_record(client, "capitulo", cap_ids[0])
+                if capitulo is not None:
+                    index.upsert_capitulo(capitulo)
+            index.upsert_relation(record)
+    elif collection == "rol":
+        if action == "delete":
+            index.remove_rol(record_id)
+        else:
+            index.upsert_rol(record)
+    elif collection == "capitulo":
+        if action == "delete":
+            index.remove_capitulo(record_id)
+        else:
+            index.upsert_capitulo(record)
+    members_cache.touch()
+
+async def member_changes(since: Optional[str] = None) -> dict:
+    """
+    Cambios de miembros posteriores al cursor `since` (ver MemberIndex.changes_since).
+    El historial vive en el índice en caché: sin caché cada consulta sería un
+    `reset` con todos los miembros, así que se responde 501.
+    """
+    if not MEMBERS_CACHE_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="El seguimiento de cambios requiere la caché de miembros (MEMBERS_CACHE_ENABLED)"
+        )
+    index = (await members_cache.get()).value
+    return index.changes_since(since)
+
+class MembersPage(NamedTuple):
+    items: list
+    total: int
+    cache: Optional[CacheResult]
+    # Versión del índice en caché de la que salió la página (None si se consultó PocketBase)
+    version: Optional[int] = None
+    # Mayor 'updated' de los registros usados, en el formato de PocketBase
+    last_modified: str = ""
+
+def _quote(value: str) -> str:
+    """
+    Literal de texto seguro para un filtro de PocketBase.
+    """
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def _can_push_down(anio_ingreso: Optional[str], search: Optional[str]) -> bool:
+    """
+    Indica si PocketBase filtra igual que el índice en memoria. El LIKE de SQLite
+    (operador `~`) ignora mayúsculas solo en ASCII y trata `%` y `_` como
+    comodines, así que una búsqueda no ASCII o con comodines, o un año que no
+    sea numérico, se resuelve en memoria. Queda una diferencia conocida: las
+    letras cuyo casefold es ASCII (p.ej. 'ß' -> 'ss') no coinciden en PocketBase.
+    """
+    if anio_ingreso is not None and not (anio_ingreso.isascii() and anio_ingreso.isdigit()):
+        return False
+    if search and (not search.isascii() or any(char in search for char in "%_\\")):
+        return False
+    return True
+
+def _usuario_filter(rol: Optional[str], anio_ingreso: Optional[str],
+                    search: Optional[str], rol_names: Optional[dict] = None) -> Optional[str]:
+    """
+    Traduce los filtros que dependen solo de la colección usuario a un `filter`
+    de PocketBase; retorna None si ningún usuario puede cumplirlos.
+    El rol se filtra por id con `rol_names` ({id: nombre}), igual que la
+    proyección: un usuario sin rol o con un rol que ya no existe es 'Miembro'.
+    """
+    parts = []
+    if rol is not None:
+        if rol == "Miembro":
+            # Todos salvo los que apuntan a un rol existente con otro nombre
+            parts.extend(
+                f"rol!={_quote(rol_id)}" for rol_id, name in rol_names.items() if name != rol
+            )
+        else:
+            rol_ids = [rol_id for rol_id, name in rol_names.items() if name == rol]
+            if not rol_ids:
+                return None
+            parts.append("(" + " || ".join(f"rol={_quote(rol_id)}" for rol_id in rol_ids) + ")")
+    if anio_ingreso is not None:
+        # anio_ingreso es lo que sigue al último '-' de semestre_ingreso (o el valor completo)
+        parts.append(
+            f"(semestre_ingreso~{_quote('%-' + anio_ingreso)} || semestre_ingreso={_quote(anio_ingreso)})"
+        )
+    for token in (search or "").split():
+        parts.append(f"(nombres~{_quote(token)} || apellidos~{_quote(token)})")
+    return " && ".join(parts)
+
+async def _fetch_users_page(client: httpx.AsyncClient, params: dict, page: int,
+                            per_page: int) -> dict:
+    res = await _request(
+        client, "GET", f"{POCKETBASE_URL}/api/collections/usuario/records",
+        params={**params, "page": page, "perPage": per_page}
+    )
+    res.raise_for_status()
+    return res.json()
+
+async def _fetch_users_window(client: httpx.AsyncClient, params: dict, page: int,
+                              per_page: int) -> Tuple[list, int]:
+    """
+    Usuarios de la página `page` de `per_page` y el total. PocketBase recorta
+    perPage a PER_PAGE, así que una página más grande se arma con las páginas
+    de PER_PAGE que la cubren (en paralelo) y se recorta.
+    """
+    if per_page <= PER_PAGE:
+        data = await _fetch_users_page(client, params, page, per_page)
+        users = data.get("items", [])
+        return users, data.get("totalItems", len(users))
+    offset = (page - 1) * per_page
+    first = offset // PER_PAGE + 1
+    last = (offset + per_page - 1) // PER_PAGE + 1
+    pages = await asyncio.gather(*(
+        _fetch_users_page(client, params, pb_page, PER_PAGE) for pb_page in range(first, last + 1)
+    ))
+    items = [item for data in pages for item in data.get("items", [])]
+    start = offset - (first - 1) * PER_PAGE
+    return items[start:start + per_page], pages[0].get("totalItems", len(items))
+
+async def _query_members_upstream(rol, anio_ingreso, search, page, per_page):
+    """
+    Consulta una página de miembros filtrando directamente en PocketBase y
+    resuelve el capítulo solo de los usuarios de esa página.
+    """
+    try:
+        client = get_client()
+        params = {"expand": "rol"}
+        rol_names = None
+        if rol is not None:
+            with stage("fetch_roles"):
+                rol_names = {
+                    record.get("id"): record.get("rol", "Miembro")
+                    for record in await _fetch_all_records(client, "rol")
+                }
+        filter_expr = _usuario_filter(rol, anio_ingreso, search, rol_names)
+        if filter_expr is None:
+            return [], 0
+        if filter_expr:
+            params["filter"] = filter_expr
+        with stage("fetch_users"):
+            if per_page is None:
+                users = await _fetch_all_records(client, "usuario", params)
+                total = len(users)
+            else:
+                users, total = await _fetch_users_window(client, params, page, per_page)
+
+        # Relaciones de los usuarios de la página, en bloques filtrados por OR
+        user_ids = [user.get("id") for user in users]
+        chunks = [user_ids[i:i + 50] for i in range(0, len(user_ids), 50)]
+        with stage("fetch_relations"):
+            rel_chunks = await asyncio.gather(*(
+                _fetch_all_records(client, "usuario_capitulo", {
+                    "filter": " || ".join(f"usuario={_quote(user_id)}" for user_id in chunk),
+                    "expand": "capitulo",
+                })
+                for chunk in chunks
+            ))
+        # Las relaciones de un usuario caen todas en el mismo bloque y en el
+        # orden de PocketBase, así que "la primera relación gana" se mantiene
+        rels = [rel for chunk in rel_chunks for rel in chunk]
+        with stage("transform"):
+            return MemberIndex.from_records(users, rels).members(), total
+    except Exception as e:
+        _raise_pocketbase_error(e)
+
+async def query_members(capitulo: Optional[str] = None, rol: Optional[str] = None,
+                        anio_ingreso: Optional[str] = None, search: Optional[str] = None,
+                        page: int = 1, per_page: Optional[int] = None) -> MembersPage:
+    """
+    Lista miembros filtrados y paginados. Con la caché activa se responde desde
+    el índice en memoria; sin caché, los filtros que dependen solo de `usuario`
+    se envían a PocketBase y el capítulo (que sale de la primera relación
+    usuario_capitulo), o una búsqueda que PocketBase no evalúa igual (ver
+    _can_push_down), obliga a filtrar sobre la proyección completa.
+    """
+    if MEMBERS_CACHE_ENABLED or capitulo is not None or not _can_push_down(anio_ingreso, search):
+        cache_result = await members_cache.get() if MEMBERS_CACHE_ENABLED else None
+        index = cache_result.value if cache_result else await _load_member_index()
+        matched = index.query(capitulo, rol, anio_ingreso, search)
+        version = index.version if cache_result else None
+        if per_page is not None:
+            start = (page - 1) * per_page
+            return MembersPage(matched[start:start + per_page], len(matched), cache_result,
+                               version, index.last_modified)
+        return MembersPage(matched, len(matched), cache_result, version, index.last_modified)
+
+    # Sin el índice completo no se conocen las bajas: la página no lleva Last-Modified
+    items, total = await _query_members_upstream(rol, anio_ingreso, search, page, per_page)
+    return MembersPage(items, total, None)
@@ -0,0 +1,139 @@
+# app/services/realtime_sync.py
+import asyncio
+import json
+import logging
+import os
+import random
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+
+from app.services import members_service
+from app.utils.http_client import get_client
+
+logger = logging.getLogger("uvicorn.error")
+
+REALTIME_ENABLED = os.getenv("MEMBERS_REALTIME_ENABLED", "false").lower() in ("1", "true", "yes")
+# Espera entre reconexiones (backoff exponencial con jitter, en segundos)
+RECONNECT_MIN_DELAY = float(os.getenv("MEMBERS_REALTIME_RECONNECT_MIN", "1"))
+RECONNECT_MAX_DELAY = float(os.getenv("MEMBERS_REALTIME_RECONNECT_MAX", "30"))
+# PocketBase cierra las conexiones inactivas a los 5 minutos
+IDLE_TIMEOUT = float(os.getenv("MEMBERS_REALTIME_IDLE_TIMEOUT", "360"))
+
+COLLECTIONS = ("usuario", "usuario_capitulo", "rol", "capitulo")
+
+
+async def _iter_sse(response: httpx.Response) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Lee un stream Server-Sent Events y retorna pares (evento, datos).
+    """
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+
+
+class RealtimeSubscriber:
+    """
+    Se suscribe al endpoint realtime de PocketBase y aplica cada evento de
+    `usuario`, `usuario_capitulo`, `rol` y `capitulo` sobre la proyección de
+    miembros en caché. Tras cada (re)conexión hace una resincronización
+    completa, porque los eventos emitidos durante la desconexión se pierden.
+    Mientras está conectado, la caché se sirve sin vencimiento por TTL.
+    """
+
+    def __init__(self):
+        self.connected = False
+        self.events = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self._delay = RECONNECT_MIN_DELAY
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._disconnected()
+
+    async def run(self):
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Conexión realtime con PocketBase perdida: {e}")
+            self._disconnected()
+            self.reconnects += 1
+            await asyncio.sleep(self._delay * random.uniform(0.5, 1.0))
+            self._delay = min(self._delay * 2, RECONNECT_MAX_DELAY)
+
+    def _disconnected(self):
+        # Sin realtime, la caché vuelve a vencer por TTL hasta la próxima resincronización
+        self.connected = False
+        members_service.members_cache.live = False
+
+    async def _listen(self):
+        client = get_client()
+        timeout = httpx.Timeout(10.0, read=IDLE_TIMEOUT)
+        async with client.stream(
+            "GET", f"{members_service.POCKETBASE_URL}/api/realtime", timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            async for event, data in _iter_sse(response):
+                payload = json.loads(data) if data else {}
+                if event == "PB_CONNECT":
+                    # Primero la suscripción y luego la resincronización: los eventos
+                    # que lleguen mientras tanto quedan en el stream y se aplican después
+                    await self._subscribe(client, payload.get("clientId"))
+                    await members_service.resync_members()
+                    self.resyncs += 1
+                    self.connected = True
+                    self._delay = RECONNECT_MIN_DELAY
+                    members_service.members_cache.live = True
+                elif event in COLLECTIONS:
+                    await members_service.apply_realtime_event(
+                        event, payload.get("action"), payload.get("record") or {}
+                    )
+                    self.events += 1
+
+    async def _subscribe(self, client: httpx.AsyncClient, client_id: str):
+        res = await members_service._request(
+            client, "POST", f"{members_service.POCKETBASE_URL}/api/realtime",
+            json={"clientId": client_id, "subscriptions": list(COLLECTIONS)}
+        )
+        res.raise_for_status()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "connected": self.connected,
+            "events": self.events,
+            "resyncs": self.resyncs,
+            "reconnects": self.reconnects,
+        }
+
+
+realtime_subscriber = RealtimeSubscriber()
@@ -0,0 +1,147 @@
+# app/services/sqlite_backend.py
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+# Backend de lectura de la proyección: "http" (API de PocketBase) o "sqlite"
+MEMBERS_READ_BACKEND = os.getenv("MEMBERS_READ_BACKEND", "http").lower()
+# Ruta al data.db de PocketBase (compartido con el contenedor de PocketBase)
+POCKETBASE_SQLITE_PATH = os.getenv("POCKETBASE_SQLITE_PATH", "/pb_data/data.db")
+SQLITE_POOL_SIZE = int(os.getenv("POCKETBASE_SQLITE_POOL_SIZE", "2"))
+
+# Una sola consulta arma usuarios, roles y todas sus relaciones usuario_capitulo.
+# Las relaciones se agregan por usuario como JSON con su rowid, que reproduce
+# el orden en que las entrega la API (la primera relación es la que se usa).
+# PocketBase guarda las relaciones simples como el id en texto.
+MEMBERS_QUERY = """
+SELECT u.id, u.nombres, u.apellidos, u.rol, u.semestre_ingreso, u.created, u.updated,
+       r.id, r.rol, r.updated,
+       rels.items
+FROM usuario u
+LEFT JOIN rol r ON r.id = u.rol
+LEFT JOIN (
+    SELECT uc.usuario,
+           json_group_array(json_array(
+               uc.rowid, uc.id, uc.capitulo, uc.created, uc.updated,
+               c.id, c.capitulo, c.updated
+           )) AS items
+    FROM usuario_capitulo uc
+    LEFT JOIN capitulo c ON c.id = uc.capitulo
+    GROUP BY uc.usuario
+) rels ON rels.usuario = u.id
+ORDER BY u.rowid
+"""
+
+
+class SQLiteReadPool:
+    """
+    Pool de conexiones de solo lectura al data.db de PocketBase. PocketBase ya
+    usa modo WAL, así que las lecturas no bloquean sus escrituras (ni al revés);
+    cada consulta ve una foto consistente de la base.
+    """
+
+    def __init__(self, path: str = POCKETBASE_SQLITE_PATH, size: int = SQLITE_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No existe la base de PocketBase: {self.path}")
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, timeout=5.0, check_same_thread=False
+        )
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0
+
+
+def _records_from_rows(rows) -> Tuple[list, list]:
+    """
+    Convierte las filas en registros con la misma forma que entrega la API
+    (usuarios con 'rol' expandido y relaciones con 'capitulo' expandido).
+    """
+    users, rels = [], []
+    for (user_id, nombres, apellidos, rol, semestre, created, updated,
+         rol_id, rol_name, rol_updated, items) in rows:
+        user = {
+            "id": user_id, "nombres": nombres or "", "apellidos": apellidos or "",
+            "rol": rol or "", "semestre_ingreso": semestre or "",
+            "created": created, "updated": updated,
+        }
+        if rol_id is not None:
+            user["expand"] = {"rol": {"id": rol_id, "rol": rol_name or "", "updated": rol_updated}}
+        users.append(user)
+        for (_, rel_id, capitulo, rel_created, rel_updated,
+             cap_id, cap_name, cap_updated) in sorted(json.loads(items or "[]")):
+            rel = {
+                "id": rel_id, "usuario": user_id, "capitulo": capitulo or "",
+                "created": rel_created, "updated": rel_updated,
+            }
+            if cap_id is not None:
+                rel["expand"] = {
+                    "capitulo": {"id": cap_id, "capitulo": cap_name or "", "updated": cap_updated}
+                }
+            rels.append(rel)
+    return users, rels
+
+
+def read_member_records(pool: SQLiteReadPool) -> Tuple[list, list]:
+    with pool.connection() as conn:
+        rows = conn.execute(MEMBERS_QUERY).fetchall()
+    return _records_from_rows(rows)
+
+
+_pool: Optional[SQLiteReadPool] = None
+
+
+def get_pool() -> SQLiteReadPool:
+    global _pool
+    if _pool is None:
+        _pool = SQLiteReadPool()
+    return _pool
+
+
+async def fetch_member_records(pool: Optional[SQLiteReadPool] = None) -> Tuple[list, list]:
+    """
+    Lee usuarios y relaciones del data.db fuera del event loop.
+    """
+    return await run_in_threadpool(read_member_records, pool or get_pool())
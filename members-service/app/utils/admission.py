@@ -0,0 +1,157 @@
+# app/utils/admission.py
+import asyncio
+import os
+import time
+from collections import deque
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# Límite inicial, mínimo y máximo de solicitudes en curso (se adapta entre ambos)
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "32"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "4"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "256"))
+# Cola corta: cuántas solicitudes esperan un cupo y cuánto tiempo como máximo (segundos)
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5"))
+# Latencia por encima de la cual una solicitud se considera señal de congestión (segundos)
+ADMISSION_LATENCY_TARGET = float(os.getenv("ADMISSION_LATENCY_TARGET", "1.0"))
+# Factor de reducción del límite ante congestión (AIMD)
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.9"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+WRITE = "write"
+READ = "read"
+
+
+class AdmissionController:
+    """
+    Control de admisión global con límite de concurrencia adaptativo (AIMD):
+
+    - Con menos de `limit` solicitudes en curso, se admite de inmediato.
+    - Si no, la solicitud espera en una cola corta (las escrituras antes que las
+      lecturas) hasta `queue_timeout` segundos; con la cola llena se rechaza al
+      instante, salvo una escritura, que desplaza a la lectura encolada más nueva.
+    - Cada solicitud lenta (más de `latency_target`) o que falló por PocketBase
+      (502, 503 o 504; ver el middleware) reduce el
+      límite multiplicativamente (a lo sumo una vez por `latency_target`); cada
+      solicitud rápida con el límite en uso lo aumenta en 1/limit.
+    """
+
+    def __init__(self, initial_limit: int = ADMISSION_INITIAL_LIMIT,
+                 min_limit: int = ADMISSION_MIN_LIMIT, max_limit: int = ADMISSION_MAX_LIMIT,
+                 queue_size: int = ADMISSION_QUEUE_SIZE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+                 latency_target: float = ADMISSION_LATENCY_TARGET,
+                 backoff: float = ADMISSION_BACKOFF):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued_total = 0
+        self.shed = 0
+        self.queue_timeouts = 0
+        self.decreases = 0
+        self._waiters = {WRITE: deque(), READ: deque()}
+        self._last_decrease = 0.0
+
+    def _pending(self, priority: str) -> int:
+        # Un waiter cancelado (timeout o cliente desconectado) sigue en la cola
+        # hasta que su solicitud sale de acquire: no ocupa lugar
+        return sum(not waiter.done() for waiter in self._waiters[priority])
+
+    @property
+    def queued(self) -> int:
+        return self._pending(WRITE) + self._pending(READ)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self, priority: str = READ) -> bool:
+        """
+        Espera un cupo; retorna False si la solicitud se descarta.
+        """
+        # Sin saltarse la cola: una lectura solo pasa directo si nadie espera
+        ahead = self._pending(WRITE) if priority == WRITE else self.queued
+        if self._has_capacity() and not ahead:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        if self.queued >= self.queue_size:
+            reads = self._waiters[READ]
+            while reads and reads[-1].done():
+                reads.pop()
+            if priority != WRITE or not reads:
+                self.shed += 1
+                return False
+            # La escritura ocupa el lugar de la lectura encolada más nueva
+            reads.pop().set_result(False)
+            self.shed += 1
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        self.queued_total += 1
+        try:
+            return await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                return True
+            self.queue_timeouts += 1
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # Cliente desconectado mientras esperaba: si ya tenía cupo, se devuelve
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release(0.0, congested=False)
+            raise
+        finally:
+            if waiter in self._waiters[priority]:
+                self._waiters[priority].remove(waiter)
+
+    def release(self, latency: float, congested: bool = False):
+        """
+        Libera un cupo, adapta el límite con la latencia observada y despierta
+        a los siguientes en la cola.
+        """
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        if congested or latency > self.latency_target:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif saturated:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        for priority in (WRITE, READ):
+            waiters = self._waiters[priority]
+            while waiters and self._has_capacity():
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                waiter.set_result(True)
+                self.in_flight += 1
+                self.admitted += 1
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queued_writes": self._pending(WRITE),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "shed": self.shed,
+            "queue_timeouts": self.queue_timeouts,
+            "decreases": self.decreases,
+        }
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,180 @@
+# app/utils/cache.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class CacheResult(NamedTuple):
+    value: Any
+    age: float
+    status: str  # HIT, MISS o STALE
+
+
+class StaleWhileRevalidateCache:
+    """
+    Caché en memoria de un único valor calculado por `loader`.
+
+    - Mientras el valor tiene menos de `ttl` segundos se sirve directamente (HIT).
+    - Entre `ttl` y `ttl + stale_ttl` se sirve el valor viejo y se lanza una sola
+      recarga en segundo plano (STALE).
+    - Pasado ese tiempo, o sin valor, se espera la recarga (MISS). Si la recarga
+      falla o tarda más de `stale_if_slow` y hay un valor previo, se sirve ese.
+    Las recargas concurrentes se agrupan en una sola llamada a `loader`.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl: float,
+                 stale_ttl: float = 0.0, stale_if_slow: Optional[float] = None):
+        self._loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stale_if_slow = stale_if_slow
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._invalidated = False
+        self._generation = 0
+        # Hasta este instante (monotonic) el valor se sirve como STALE aunque
+        # supere ttl + stale_ttl; ver `set(stale_for=...)`
+        self._stale_until: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Con `live` activo el valor se mantiene al día por otra vía (p.ej. realtime)
+        # y se sirve sin vencimiento por TTL
+        self.live = False
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    @property
+    def has_value(self) -> bool:
+        return self._loaded_at is not None
+
+    def age(self) -> float:
+        if self._loaded_at is None:
+            return 0.0
+        return time.monotonic() - self._loaded_at
+
+    async def get(self) -> CacheResult:
+        if self.has_value and not self._invalidated:
+            age = self.age()
+            if self.live or age < self.ttl:
+                self.hits += 1
+                return CacheResult(self._value, age, "HIT")
+            if age < self.ttl + self.stale_ttl or self._in_grace():
+                self.stale_hits += 1
+                self._start_refresh()
+                return CacheResult(self._value, age, "STALE")
+
+        self.misses += 1
+        task = self._start_refresh()
+        try:
+            if self.has_value and self.stale_if_slow is not None:
+                await asyncio.wait_for(asyncio.shield(task), self.stale_if_slow)
+            else:
+                await asyncio.shield(task)
+        except Exception:
+            # PocketBase caído o lento: se sirve el último valor conocido
+            if not self.has_value:
+                raise
+            self.stale_hits += 1
+            return CacheResult(self._value, self.age(), "STALE")
+        return CacheResult(self._value, self.age(), "MISS")
+
+    def _in_grace(self) -> bool:
+        return self._stale_until is not None and time.monotonic() < self._stale_until
+
+    def refresh(self) -> asyncio.Task:
+        """
+        Lanza (o reutiliza) una recarga en segundo plano sin esperarla.
+        """
+        return self._start_refresh()
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    async def _refresh(self):
+        self.refreshes += 1
+        generation = self._generation
+        try:
+            value = await self._loader()
+        except Exception:
+            self.errors += 1
+            raise
+        if generation != self._generation and self.has_value:
+            # El valor en caché se reemplazó (set) o se modificó (touch) mientras se
+            # cargaba: el resultado puede no incluir esos cambios y se descarta. Se
+            # conserva el valor modificado, que se recargará en la próxima lectura
+            # si sigue vencido (o si se invalidó)
+            return
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self._stale_until = None
+        # Si se vació la caché mientras se cargaba, el valor se usa pero queda vencido
+        self._invalidated = generation != self._generation
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error recargando la caché: {task.exception()}")
+
+    def set(self, value: Any, age: float = 0.0, stale_for: float = 0.0):
+        """
+        Reemplaza el valor en caché (por ejemplo, tras una resincronización
+        completa). `age` es la antigüedad real del valor, si no es nuevo; con
+        `stale_for` se sirve como STALE (sin esperar la recarga) durante esos
+        segundos aunque haya superado ttl + stale_ttl, hasta que una recarga
+        lo reemplace.
+        """
+        self._value = value
+        self._loaded_at = time.monotonic() - age
+        self._stale_until = time.monotonic() + stale_for if stale_for > 0 else None
+        self._invalidated = False
+        self._generation += 1
+
+    def clear(self):
+        """
+        Descarta el valor en caché y sale del modo `live`.
+        """
+        self._value = None
+        self._loaded_at = None
+        self._stale_until = None
+        self._invalidated = False
+        self._generation += 1
+        self.live = False
+
+    def peek(self) -> Any:
+        """
+        Retorna el valor en caché sin recargarlo (None si aún no hay valor).
+        """
+        return self._value if self.has_value else None
+
+    def touch(self):
+        """
+        Registra un cambio aplicado directamente sobre el valor en caché. Si hay
+        una recarga en curso, su resultado pudo leerse antes del cambio y se
+        descarta al terminar.
+        """
+        self._generation += 1
+
+    def invalidate(self):
+        """
+        Marca el valor como vencido; la próxima lectura lo recarga.
+        """
+        self._generation += 1
+        self._invalidated = True
+
+    def stats(self) -> dict:
+        return {
+            "age": round(self.age(), 3) if self.has_value else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
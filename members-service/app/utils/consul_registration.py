@@ -1,6 +1,13 @@
-# members-service/app/consul_registration.py
+# app/utils/consul_registration.py
+import asyncio
+import logging
 import os
-import requests
+import random
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger("uvicorn.error")
 
 CONSUL_ADDRESS = os.getenv("CONSUL_ADDRESS", "http://consul:8500")
 SERVICE_NAME = "members-service"
@@ -8,10 +15,16 @@ SERVICE_NAME = "members-service"
 SERVICE_ID = os.getenv("HOSTNAME", SERVICE_NAME)
 SERVICE_ADDRESS = os.getenv("SERVICE_ADDRESS", "members_service")
 SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+# Timeout de cada llamada a Consul y espera entre reintentos (segundos)
+CONSUL_TIMEOUT = float(os.getenv("CONSUL_TIMEOUT", "2"))
+CONSUL_RETRY_MIN_DELAY = float(os.getenv("CONSUL_RETRY_MIN_DELAY", "1"))
+CONSUL_RETRY_MAX_DELAY = float(os.getenv("CONSUL_RETRY_MAX_DELAY", "30"))
+# Cada cuánto se verifica que el registro sigue en Consul (p.ej. tras un reinicio)
+CONSUL_CHECK_INTERVAL = float(os.getenv("CONSUL_CHECK_INTERVAL", "30"))
+
 
-def register_service():
-    url = f"{CONSUL_ADDRESS}/v1/agent/service/register"
-    payload = {
+def _payload() -> dict:
+    return {
         "Name": SERVICE_NAME,
         "ID": SERVICE_ID,
         "Address": SERVICE_ADDRESS,
@@ -21,18 +34,94 @@ def register_service():
             "Interval": "10s"
         }
     }
-    try:
-        r = requests.put(url, json=payload)
-        r.raise_for_status()
-        print("Servicio registrado en Consul.")
-    except Exception as e:
-        print(f"Error al registrar el servicio en Consul: {e}")
-
-def deregister_service():
-    url = f"{CONSUL_ADDRESS}/v1/agent/service/deregister/{SERVICE_ID}"
-    try:
-        r = requests.put(url)
-        r.raise_for_status()
-        print("Servicio desregistrado en Consul.")
-    except Exception as e:
-        print(f"Error al desregistrar el servicio en Consul: {e}")
+
+
+async def register_service(client: httpx.AsyncClient):
+    r = await client.put(f"{CONSUL_ADDRESS}/v1/agent/service/register", json=_payload())
+    r.raise_for_status()
+
+
+async def is_registered(client: httpx.AsyncClient) -> bool:
+    r = await client.get(f"{CONSUL_ADDRESS}/v1/agent/service/{SERVICE_ID}")
+    if r.status_code == 404:
+        return False
+    r.raise_for_status()
+    return True
+
+
+async def deregister_service(client: httpx.AsyncClient):
+    r = await client.put(f"{CONSUL_ADDRESS}/v1/agent/service/deregister/{SERVICE_ID}")
+    r.raise_for_status()
+
+
+class ConsulRegistrar:
+    """
+    Registra el servicio en Consul en segundo plano, sin bloquear el arranque:
+    reintenta con backoff exponencial mientras Consul no responda y vuelve a
+    registrarse si el registro desaparece (p.ej. porque Consul se reinició).
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.registered = False
+        self.registrations = 0
+        self.failures = 0
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._client = httpx.AsyncClient(timeout=CONSUL_TIMEOUT, transport=self._transport)
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """
+        Detiene el registro y se desregistra (con timeout, sin reintentos).
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.registered:
+            try:
+                await deregister_service(self._client)
+                logger.info("Servicio desregistrado en Consul.")
+            except Exception as e:
+                logger.warning(f"Error al desregistrar el servicio en Consul: {e}")
+            self.registered = False
+        await self._client.aclose()
+
+    async def run(self):
+        delay = CONSUL_RETRY_MIN_DELAY
+        while True:
+            try:
+                if not self.registered or not await is_registered(self._client):
+                    if self.registered:
+                        logger.warning("El servicio ya no figura en Consul; se vuelve a registrar.")
+                    await register_service(self._client)
+                    self.registered = True
+                    self.registrations += 1
+                    logger.info("Servicio registrado en Consul.")
+                delay = CONSUL_RETRY_MIN_DELAY
+                await asyncio.sleep(CONSUL_CHECK_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Error al registrar el servicio en Consul: {e!r}")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                delay = min(delay * 2, CONSUL_RETRY_MAX_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "registered": self.registered,
+            "registrations": self.registrations,
+            "failures": self.failures,
+        }
+
+
+consul_registrar = ConsulRegistrar()
@@ -0,0 +1,171 @@
+# app/utils/encoded_response.py
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Hashable, NamedTuple, Optional
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se ofrece gzip
+    brotli = None
+
+# Por debajo de este tamaño no vale la pena comprimir (igual que GZipMiddleware)
+MIN_COMPRESS_SIZE = int(os.getenv("RESPONSE_MIN_COMPRESS_SIZE", "1000"))
+# Niveles intermedios: los máximos cuestan varias veces más CPU por pocos bytes menos
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+# Representaciones codificadas que se conservan (por versión de datos y consulta)
+ENCODED_CACHE_SIZE = int(os.getenv("RESPONSE_ENCODED_CACHE_SIZE", "64"))
+
+
+class EncodedBody(NamedTuple):
+    variants: dict               # {content-coding: bytes}, siempre incluye "identity"
+    digest: str                  # hash del contenido sin comprimir
+    last_modified: Optional[str]  # fecha HTTP
+
+    def etag(self, coding: str) -> str:
+        # ETag fuerte por representación: cada content-coding tiene el suyo
+        return f'"{self.digest}"' if coding == "identity" else f'"{self.digest}-{coding}"'
+
+
+def http_date(timestamp: str) -> Optional[str]:
+    """
+    Convierte un timestamp de PocketBase ('2025-04-06 05:30:42.369Z') a fecha HTTP.
+    """
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def encode_json(content: Any, last_modified: Optional[str] = None) -> EncodedBody:
+    """
+    Serializa `content` una sola vez con orjson (que acepta directamente los
+    dataclasses de miembros) y precalcula sus variantes comprimidas.
+    Con listados grandes es trabajo de CPU: se llama fuera del event loop.
+    """
+    body = orjson.dumps(content)
+    variants = {"identity": body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        variants["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return EncodedBody(variants, digest, last_modified)
+
+
+def _accepted_codings(accept_encoding: str) -> dict:
+    codings = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+
+def choose_coding(accept_encoding: Optional[str], encoded: EncodedBody) -> str:
+    """
+    Elige la variante según Accept-Encoding: brotli, luego gzip, luego sin comprimir.
+    """
+    codings = _accepted_codings(accept_encoding or "")
+    for coding in ("br", "gzip"):
+        if coding in encoded.variants and codings.get(coding, codings.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+def _not_modified(headers: Headers, encoded: EncodedBody) -> bool:
+    """
+    Evalúa las precondiciones de un GET (RFC 9110, sección 13.2.2): si viene
+    If-None-Match decide solo el ETag y se ignora If-Modified-Since.
+    Last-Modified tiene resolución de un segundo, así que un cambio en el mismo
+    segundo que la copia del cliente no se detecta por fecha; el ETag sí lo detecta.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparación débil (RFC 9110): vale el ETag de cualquier variante del mismo contenido
+        etags = {encoded.etag(coding) for coding in encoded.variants}
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or bool(tags & etags)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and encoded.last_modified:
+        try:
+            return parsedate_to_datetime(encoded.last_modified) <= parsedate_to_datetime(
+                if_modified_since
+            )
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_response(headers: Headers, encoded: EncodedBody,
+                         extra_headers: Optional[dict] = None) -> Response:
+    """
+    Respuesta 304 si el cliente ya tiene la versión actual o 200 con la
+    variante comprimida que acepta, sin volver a serializar ni comprimir.
+    """
+    coding = choose_coding(headers.get("accept-encoding"), encoded)
+    response_headers = {"ETag": encoded.etag(coding), "Vary": "Accept-Encoding"}
+    if encoded.last_modified:
+        response_headers["Last-Modified"] = encoded.last_modified
+    response_headers.update(extra_headers or {})
+    if _not_modified(headers, encoded):
+        return Response(status_code=304, headers=response_headers)
+    if coding != "identity":
+        response_headers["Content-Encoding"] = coding
+    return Response(
+        content=encoded.variants[coding], media_type="application/json",
+        headers=response_headers
+    )
+
+
+class EncodedCache:
+    """
+    LRU acotada de cuerpos ya codificados, indexada por (versión de datos, consulta).
+    """
+
+    def __init__(self, max_entries: int = ENCODED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[EncodedBody]:
+        encoded = self._entries.get(key)
+        if encoded is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return encoded
+
+    def put(self, key: Hashable, encoded: EncodedBody):
+        self._entries[key] = encoded
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,88 @@
+# app/utils/http_client.py
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger("uvicorn.error")
+
+# Límites del pool de conexiones hacia PocketBase
+MAX_CONNECTIONS = int(os.getenv("POCKETBASE_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("POCKETBASE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("POCKETBASE_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("POCKETBASE_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Timeouts por operación (en segundos)
+CONNECT_TIMEOUT = float(os.getenv("POCKETBASE_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("POCKETBASE_READ_TIMEOUT", "10"))
+WRITE_TIMEOUT = float(os.getenv("POCKETBASE_WRITE_TIMEOUT", "10"))
+POOL_TIMEOUT = float(os.getenv("POCKETBASE_POOL_TIMEOUT", "5"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_enabled() -> bool:
+    """
+    HTTP/2 requiere el paquete opcional 'h2'; si no está instalado se usa HTTP/1.1.
+    """
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("POCKETBASE_HTTP2 activo pero 'h2' no está instalado; se usa HTTP/1.1")
+        return False
+    return True
+
+
+def build_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Construye un cliente HTTP con el pool y los timeouts configurados.
+    `transport` permite reemplazar la red (por ejemplo, en tests).
+    """
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        connect=CONNECT_TIMEOUT,
+        read=READ_TIMEOUT,
+        write=WRITE_TIMEOUT,
+        pool=POOL_TIMEOUT,
+    )
+    if transport is not None:
+        return httpx.AsyncClient(transport=transport, timeout=timeout)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=_http2_enabled())
+
+
+async def init_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Crea el cliente compartido de la aplicación (se llama en el startup).
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = build_client(transport)
+    return _client
+
+
+async def close_client():
+    """
+    Cierra el cliente compartido y libera sus conexiones (se llama en el shutdown).
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Retorna el cliente compartido, creándolo si aún no existe.
+    """
+    global _client
+    if _client is None:
+        _client = build_client()
+    return _client
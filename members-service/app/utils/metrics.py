@@ -0,0 +1,149 @@
+# app/utils/metrics.py
+import asyncio
+import re
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+from opentelemetry import trace
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.utils.resilience import deadline_exceeded
+
+tracer = trace.get_tracer("members-service")
+
+# Buckets (segundos) pensados para respuestas desde memoria hasta timeouts de PocketBase
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUESTS = Histogram(
+    "members_http_request_duration_seconds",
+    "Duración de las solicitudes HTTP por método, ruta y estado",
+    ["method", "route", "status"], buckets=_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "members_http_requests_in_flight", "Solicitudes HTTP en curso"
+)
+UPSTREAM_REQUESTS = Histogram(
+    "members_pocketbase_request_duration_seconds",
+    "Duración de las llamadas a PocketBase por colección, operación y estado",
+    ["collection", "operation", "status"], buckets=_BUCKETS,
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "members_pocketbase_requests_in_flight", "Llamadas a PocketBase en curso"
+)
+STAGE_DURATION = Histogram(
+    "members_stage_duration_seconds",
+    "Duración de cada etapa de /members (auth, fetch, transform, serialize, ...)",
+    ["stage"], buckets=_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "members_pocketbase_errors", "Llamadas a PocketBase que fallaron sin respuesta",
+    ["collection", "operation"],
+)
+
+_RECORDS_PATH = re.compile(r"/api/collections/([^/]+)/records(/[^/?]+)?")
+_OPERATIONS = {"GET": "view", "PATCH": "update", "DELETE": "delete"}
+
+
+def upstream_labels(method: str, url: str) -> tuple:
+    """
+    (colección, operación) de una llamada a PocketBase, sin ids para acotar la cardinalidad.
+    """
+    match = _RECORDS_PATH.search(url)
+    if match is None:
+        return ("realtime" if "/api/realtime" in url else "other", method.lower())
+    if match.group(2) is None:
+        return match.group(1), "list" if method == "GET" else "create"
+    return match.group(1), _OPERATIONS.get(method, method.lower())
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Mide una etapa: la registra en el histograma y como span hijo de la traza actual.
+    """
+    start = time.perf_counter()
+    with tracer.start_as_current_span(f"members.{name}"):
+        try:
+            yield
+        finally:
+            STAGE_DURATION.labels(name).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def upstream_call(method: str, url: str):
+    """
+    Mide una llamada HTTP a PocketBase; quien llama asigna `call["status"]`.
+    Una llamada cortada por el plazo de ResilientCaller se registra con estado
+    "timeout" (y como error).
+    """
+    collection, operation = upstream_labels(method, url)
+    call = {"status": None}
+    start = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc()
+    with tracer.start_as_current_span(
+        f"pocketbase {operation} {collection}", attributes={"http.method": method}
+    ) as span:
+        try:
+            yield call
+        except asyncio.CancelledError:
+            if deadline_exceeded():
+                call["status"] = "timeout"
+                UPSTREAM_ERRORS.labels(collection, operation).inc()
+            # Otra cancelación (la perdedora de un hedge, un cliente desconectado) no es un error
+            raise
+        except BaseException:
+            UPSTREAM_ERRORS.labels(collection, operation).inc()
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            if isinstance(call["status"], int):
+                span.set_attribute("http.status_code", call["status"])
+            if call["status"] is not None:
+                UPSTREAM_REQUESTS.labels(collection, operation, str(call["status"])).observe(
+                    time.perf_counter() - start
+                )
+
+
+class _StatsCollector:
+    """
+    Expone los contadores que los componentes ya llevan (método stats()) y se
+    leen solo al hacer scrape: no agregan costo al camino de cada solicitud.
+    """
+
+    def __init__(self):
+        self._sources = {}
+
+    def register(self, name: str, stats: Callable[[], dict],
+                 counters: Iterable[str] = (), gauges: Iterable[str] = ()):
+        # Por nombre: si el componente se vuelve a crear, reemplaza al anterior
+        self._sources[name] = (stats, tuple(counters), tuple(gauges))
+
+    def collect(self):
+        for name, (stats, counters, gauges) in list(self._sources.items()):
+            values = stats()
+            for key in counters:
+                yield CounterMetricFamily(
+                    f"members_{name}_{key}", f"{name}: {key}", value=float(values.get(key) or 0)
+                )
+            for key in gauges:
+                yield GaugeMetricFamily(
+                    f"members_{name}_{key}", f"{name}: {key}", value=float(values.get(key) or 0)
+                )
+
+
+stats_collector = _StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def register_stats(name: str, stats: Callable[[], dict],
+                   counters: Iterable[str] = (), gauges: Iterable[str] = ()):
+    stats_collector.register(name, stats, counters, gauges)
+
+
+def render_latest() -> tuple:
+    """
+    Cuerpo y content-type del formato de exposición de Prometheus.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
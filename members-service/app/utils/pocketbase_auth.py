@@ -0,0 +1,95 @@
+# app/utils/pocketbase_auth.py
+import asyncio
+import os
+import time
+from typing import Optional
+
+import httpx
+import jwt
+
+# Segundos antes del vencimiento en los que el token se renueva de forma proactiva
+TOKEN_REFRESH_MARGIN = float(os.getenv("POCKETBASE_TOKEN_REFRESH_MARGIN", "60"))
+# Vigencia asumida cuando el token no trae el claim 'exp'
+TOKEN_DEFAULT_TTL = float(os.getenv("POCKETBASE_TOKEN_DEFAULT_TTL", "300"))
+
+
+class AdminTokenManager:
+    """
+    Mantiene en caché el token de administrador de PocketBase.
+    El token se renueva antes de su vencimiento (claim 'exp' del JWT) y los
+    logins concurrentes se agrupan en una sola petición al endpoint de auth.
+    """
+
+    def __init__(self, base_url: str, identity: str, password: str,
+                 refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.base_url = base_url
+        self.identity = identity
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        # Contadores para verificar que las llamadas de auth bajan bajo carga
+        self.hits = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self.refresh_margin
+
+    async def get_token(self, client: httpx.AsyncClient) -> str:
+        """
+        Retorna un token válido, haciendo login solo si es necesario.
+        """
+        if self._is_valid():
+            self.hits += 1
+            return self._token
+        async with self._lock:
+            # Otra tarea pudo haber renovado el token mientras se esperaba el lock
+            if self._is_valid():
+                self.hits += 1
+                return self._token
+            await self._login(client)
+            return self._token
+
+    async def _login(self, client: httpx.AsyncClient):
+        auth_response = await client.post(
+            f"{self.base_url}/api/admins/auth-with-password",
+            json={"identity": self.identity, "password": self.password}
+        )
+        auth_response.raise_for_status()
+        token = auth_response.json().get("token")
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            exp = None
+        self._token = token
+        self._expires_at = float(exp) if exp else time.time() + TOKEN_DEFAULT_TTL
+        self.refreshes += 1
+
+    async def headers(self, client: httpx.AsyncClient) -> dict:
+        """
+        Retorna el header de autorización con el token vigente.
+        """
+        token = await self.get_token(client)
+        return {"Authorization": f"Bearer {token}"}
+
+    def invalidate(self, token: Optional[str] = None):
+        """
+        Descarta el token en caché (por ejemplo, tras un 401).
+        Si se indica `token`, solo se descarta si sigue siendo el vigente,
+        para no invalidar un token que otra tarea acaba de renovar.
+        """
+        if token is not None and token != self._token:
+            return
+        self._token = None
+        self._expires_at = 0.0
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+            "expires_in": max(0.0, round(self._expires_at - time.time(), 1)) if self._token else 0.0,
+        }
@@ -0,0 +1,352 @@
+# app/utils/rate_limiter.py
+import asyncio
+import ipaddress
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("uvicorn.error")
+
+# Estado por cliente: siempre una tupla de 3 floats (memoria constante por cliente)
+State = Tuple[float, float, float]
+
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/members-rate-limit.db")
+# Proxies cuyo X-Real-IP / X-Forwarded-For se acepta, separados por coma: IPs,
+# redes (CIDR) o nombres de host (p.ej. el gateway nginx). "private" confía en
+# cualquier IP privada y "*" en todas (solo si el puerto no está expuesto)
+RATE_LIMIT_TRUSTED_PROXIES = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "nginx_gateway")
+# Cada cuánto se vuelven a resolver los nombres de host de los proxies (segundos)
+RATE_LIMIT_PROXY_RESOLVE_TTL = float(os.getenv("RATE_LIMIT_PROXY_RESOLVE_TTL", "60"))
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float        # segundos hasta recuperar el cupo completo
+    retry_after: float  # segundos hasta poder reintentar (0 si se permitió)
+
+
+class TokenBucket:
+    """
+    Balde de `limit` fichas que se rellena a `limit / window` fichas por segundo.
+    Estado: (fichas, último acceso, sin uso).
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+
+    def hit(self, state: Optional[State], now: float) -> Tuple[State, RateLimitDecision]:
+        tokens, last = (state[0], state[1]) if state else (float(self.limit), now)
+        tokens = min(float(self.limit), tokens + (now - last) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            decision = RateLimitDecision(
+                True, self.limit, int(tokens), (self.limit - tokens) / self.rate, 0.0
+            )
+        else:
+            retry_after = (1 - tokens) / self.rate
+            decision = RateLimitDecision(
+                False, self.limit, 0, (self.limit - tokens) / self.rate, retry_after
+            )
+        return (tokens, now, 0.0), decision
+
+
+class SlidingWindowCounter:
+    """
+    Aproxima una ventana deslizante con el contador de la ventana fija actual y
+    el de la anterior, ponderado por la fracción de ventana que aún se solapa.
+    Estado: (número de la ventana actual, conteo actual, conteo anterior).
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+
+    def hit(self, state: Optional[State], now: float) -> Tuple[State, RateLimitDecision]:
+        current = float(math.floor(now / self.window))
+        window_number, count, previous = state if state else (current, 0.0, 0.0)
+        if window_number != current:
+            previous = count if current - window_number == 1 else 0.0
+            count = 0.0
+            window_number = current
+
+        start = window_number * self.window
+        elapsed = now - start
+        estimated = previous * (1 - elapsed / self.window) + count
+        reset = self.window - elapsed + (self.window if previous else 0.0)
+        if estimated + 1 > self.limit:
+            if count + 1 > self.limit or not previous:
+                retry_after = self.window - elapsed
+            else:
+                # Momento en que el peso de la ventana anterior deja lugar a una solicitud más
+                retry_after = max(
+                    0.0, self.window * (1 - (self.limit - count - 1) / previous) - elapsed
+                )
+            return (window_number, count, previous), RateLimitDecision(
+                False, self.limit, 0, reset, retry_after
+            )
+        count += 1
+        remaining = max(0, math.floor(self.limit - estimated - 1))
+        return (window_number, count, previous), RateLimitDecision(
+            True, self.limit, remaining, reset, 0.0
+        )
+
+
+ALGORITHMS = {"token_bucket": TokenBucket, "sliding_window": SlidingWindowCounter}
+
+
+class MemoryStore:
+    """
+    Estado por cliente en memoria del proceso, como LRU acotada: se descartan
+    los clientes inactivos por más de `idle_ttl` y, si se supera `max_clients`,
+    los de acceso más antiguo. Cada solicitud cuesta O(1).
+    """
+
+    blocking = False
+
+    def __init__(self, algorithm, max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+                 idle_ttl: Optional[float] = None):
+        self.algorithm = algorithm
+        self.max_clients = max_clients
+        # Pasadas dos ventanas el estado de cualquier algoritmo vuelve a cero
+        self.idle_ttl = idle_ttl if idle_ttl is not None else 2 * algorithm.window
+        self._clients = OrderedDict()  # {clave: (último acceso, estado)}
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key: str, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        entry = self._clients.pop(key, None)
+        state, decision = self.algorithm.hit(entry[1] if entry else None, now)
+        self._clients[key] = (now, state)
+        self._evict(now)
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+    def _evict(self, now: float):
+        clients = self._clients
+        while len(clients) > self.max_clients:
+            clients.popitem(last=False)
+        # Los primeros de la LRU son los más inactivos; basta con mirar el frente
+        while clients:
+            last_seen, _ = next(iter(clients.values()))
+            if now - last_seen <= self.idle_ttl:
+                break
+            clients.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> dict:
+        return {"clients": len(self._clients), "allowed": self.allowed, "limited": self.limited}
+
+
+class SQLiteStore:
+    """
+    Estado compartido entre workers del mismo host mediante un archivo SQLite
+    local (modo WAL). Cada solicitud es una transacción corta sobre una fila.
+    """
+
+    blocking = True
+    _CLEANUP_EVERY = 1000
+
+    def __init__(self, algorithm, path: str = RATE_LIMIT_SQLITE_PATH,
+                 max_clients: int = RATE_LIMIT_MAX_CLIENTS, idle_ttl: Optional[float] = None):
+        self.algorithm = algorithm
+        self.path = path
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl if idle_ttl is not None else 2 * algorithm.window
+        self._local = threading.local()
+        self._hits = 0
+        self.allowed = 0
+        self.limited = 0
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            "key TEXT PRIMARY KEY, touched REAL NOT NULL, a REAL, b REAL, c REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rate_limit_touched ON rate_limit (touched)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT a, b, c FROM rate_limit WHERE key = ?", (key,)
+            ).fetchone()
+            state, decision = self.algorithm.hit(tuple(row) if row else None, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit (key, touched, a, b, c) VALUES (?, ?, ?, ?, ?)",
+                (key, now, *state),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._hits += 1
+        if self._hits % self._CLEANUP_EVERY == 0:
+            self._evict(conn, now)
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM rate_limit WHERE touched < ?", (now - self.idle_ttl,))
+        conn.execute(
+            "DELETE FROM rate_limit WHERE key IN ("
+            "SELECT key FROM rate_limit ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (self.max_clients,),
+        )
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "limited": self.limited}
+
+
+def build_store(max_requests: int, window_seconds: float,
+                algorithm: str = RATE_LIMIT_ALGORITHM, backend: str = RATE_LIMIT_BACKEND):
+    """
+    Crea el almacenamiento del rate limiter según la configuración.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo de rate limit desconocido: {algorithm}")
+    engine = ALGORITHMS[algorithm](max_requests, window_seconds)
+    if backend == "sqlite":
+        return SQLiteStore(engine)
+    if backend != "memory":
+        raise ValueError(f"Backend de rate limit desconocido: {backend}")
+    return MemoryStore(engine)
+
+
+class TrustedProxies:
+    """
+    Conjunto de proxies de confianza. Los nombres de host se resuelven en
+    segundo plano (`start`) al arrancar y de nuevo cada `resolve_ttl` segundos
+    (la IP de un contenedor cambia al recrearlo); la consulta por solicitud
+    solo compara contra redes y direcciones ya resueltas, nunca espera al DNS.
+    """
+
+    def __init__(self, spec: str, resolve_ttl: float = RATE_LIMIT_PROXY_RESOLVE_TTL):
+        self.any = self.private = False
+        self.networks = []
+        self.hostnames = []
+        self.resolve_ttl = resolve_ttl
+        for item in (item.strip() for item in spec.split(",")):
+            if not item:
+                continue
+            if item == "*":
+                self.any = True
+            elif item == "private":
+                self.private = True
+            else:
+                try:
+                    self.networks.append(ipaddress.ip_network(item, strict=False))
+                except ValueError:
+                    self.hostnames.append(item)
+        self._by_host = {}
+        self._resolved = frozenset()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        """
+        Resuelve los nombres de host fuera del event loop. Si un nombre no
+        resuelve, se conservan sus últimas direcciones conocidas.
+        """
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.getaddrinfo(host, None) for host in self.hostnames), return_exceptions=True
+        )
+        for host, infos in zip(self.hostnames, results):
+            if isinstance(infos, OSError):
+                logger.warning(f"No se pudo resolver el proxy de confianza {host}: {infos}")
+                continue
+            if isinstance(infos, BaseException):
+                raise infos
+            self._by_host[host] = frozenset(info[4][0] for info in infos)
+        self._resolved = frozenset().union(*self._by_host.values())
+
+    def start(self):
+        if self.hostnames and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.resolve_ttl)
+
+    def __contains__(self, peer: str) -> bool:
+        if self.any:
+            return True
+        try:
+            address = ipaddress.ip_address(peer)
+        except ValueError:
+            return False
+        if self.private and (address.is_private or address.is_loopback):
+            return True
+        if any(address in network for network in self.networks):
+            return True
+        return peer in self._resolved
+
+
+trusted_proxies = TrustedProxies(RATE_LIMIT_TRUSTED_PROXIES)
+
+
+def resolve_client_ip(peer: Optional[str], real_ip: Optional[str] = None,
+                      forwarded_for: Optional[str] = None,
+                      trusted: Optional[TrustedProxies] = None) -> str:
+    """
+    IP del cliente real. Detrás del gateway nginx la conexión viene del proxy,
+    por lo que se usan sus headers solo si quien conecta es un proxy de
+    confianza: X-Real-IP (nginx lo reescribe con la IP que ve) o, si no está,
+    la entrada de X-Forwarded-For más a la derecha que no sea un proxy de
+    confianza (las de la izquierda las puede escribir el cliente).
+    """
+    trusted = trusted or trusted_proxies
+    peer = peer or "unknown"
+    if peer not in trusted:
+        return peer
+    if real_ip:
+        return real_ip.strip()
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if hop not in trusted:
+                return hop
+        if hops:
+            return hops[0]
+    return peer
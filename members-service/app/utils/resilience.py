@@ -0,0 +1,303 @@
+# app/utils/resilience.py
+import asyncio
+import contextvars
+import os
+import random
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+# Tiempo máximo de cada intento contra PocketBase (segundos)
+CALL_DEADLINE = float(os.getenv("POCKETBASE_CALL_DEADLINE", "5"))
+# Reintentos de lecturas idempotentes ante errores transitorios
+MAX_RETRIES = int(os.getenv("POCKETBASE_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("POCKETBASE_RETRY_BASE_DELAY", "0.1"))
+RETRY_MAX_DELAY = float(os.getenv("POCKETBASE_RETRY_MAX_DELAY", "2"))
+# El circuito se abre si, con al menos BREAKER_MIN_CALLS llamadas en la
+# ventana, la proporción de fallas supera BREAKER_FAILURE_RATE
+BREAKER_FAILURE_RATE = float(os.getenv("POCKETBASE_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_MIN_CALLS = int(os.getenv("POCKETBASE_BREAKER_MIN_CALLS", "10"))
+BREAKER_WINDOW = float(os.getenv("POCKETBASE_BREAKER_WINDOW", "30"))
+BREAKER_OPEN_SECONDS = float(os.getenv("POCKETBASE_BREAKER_OPEN_SECONDS", "15"))
+# Hedging: si un GET tarda más que el percentil indicado de las latencias
+# recientes, se lanza una segunda petición y se usa la que responda primero
+HEDGE_ENABLED = os.getenv("POCKETBASE_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_QUANTILE = float(os.getenv("POCKETBASE_HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("POCKETBASE_HEDGE_MIN_DELAY", "0.05"))
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+RETRY_STATUSES = (502, 503, 504)
+_LATENCY_SAMPLES = 200
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """
+    El intento superó su plazo (se trata como cualquier timeout de httpx).
+    """
+
+
+class CircuitOpenError(Exception):
+    """
+    El circuito está abierto: la llamada se rechaza sin contactar a PocketBase.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Circuito abierto hacia PocketBase")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por tasa de errores en una ventana de tiempo. Abierto,
+    rechaza todo durante `open_seconds`; luego deja pasar una sola llamada de
+    prueba (semiabierto) que lo cierra si funciona o lo vuelve a abrir si falla.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_rate: float = BREAKER_FAILURE_RATE,
+                 min_calls: int = BREAKER_MIN_CALLS, window: float = BREAKER_WINDOW,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes = deque()  # (momento, falló)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.transitions = Counter()
+        self.rejected = 0
+
+    def allow(self, now: Optional[float] = None):
+        """
+        Lanza CircuitOpenError si la llamada no debe hacerse.
+        """
+        now = time.monotonic() if now is None else now
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(self.open_seconds - (now - self._opened_at))
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(self.open_seconds)
+            self._probing = True
+
+    def record(self, failed: bool, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+            if failed:
+                self._open(now)
+            else:
+                self._reset()
+                self._transition(self.CLOSED)
+            return
+        if self.state == self.OPEN:
+            return
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, old_failed = self._outcomes.popleft()
+            self._failures -= old_failed
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+            self._open(now)
+
+    def abandon(self):
+        """
+        Una llamada de prueba se canceló sin resultado: se permite otra.
+        """
+        self._probing = False
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._reset()
+        self._transition(self.OPEN)
+
+    def _reset(self):
+        self._outcomes.clear()
+        self._failures = 0
+
+    def _transition(self, state: str):
+        self.state = state
+        self.transitions[state] += 1
+
+    def stats(self) -> dict:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "error_rate": round(self._failures / calls, 3) if calls else 0.0,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
+
+
+# Estado del plazo del intento en curso; las tareas que lanza el intento lo
+# heredan (comparten el dict), así que ven el vencimiento antes de ser canceladas
+_attempt_deadline = contextvars.ContextVar("attempt_deadline", default=None)
+
+
+def deadline_exceeded() -> bool:
+    """
+    True si la tarea actual se está cancelando porque venció el plazo de su
+    intento (y no, p.ej., por un cliente desconectado o un hedge perdedor).
+    """
+    deadline = _attempt_deadline.get()
+    return deadline is not None and deadline["exceeded"]
+
+
+def _status_of(result) -> Optional[int]:
+    # Una respuesta, o un raise_for_status() fallido (p.ej. el login de administrador)
+    if isinstance(result, httpx.HTTPStatusError):
+        return result.response.status_code
+    if isinstance(result, BaseException):
+        return None
+    return result.status_code
+
+
+def _failed(result) -> bool:
+    """
+    Fallas que cuentan para el circuito: errores de transporte y respuestas 5xx
+    (también las que llegan como HTTPStatusError).
+    """
+    if isinstance(result, httpx.TransportError):
+        return True
+    status_code = _status_of(result)
+    return status_code is not None and status_code >= 500
+
+
+def _retryable(result) -> bool:
+    if isinstance(result, httpx.TransportError):
+        return True
+    return _status_of(result) in RETRY_STATUSES
+
+
+class ResilientCaller:
+    """
+    Envuelve las llamadas salientes con un plazo por intento, reintentos con
+    backoff exponencial y jitter para métodos idempotentes, un circuit breaker
+    compartido y, opcionalmente, hedging de GETs lentos.
+    """
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None,
+                 deadline: float = CALL_DEADLINE, max_retries: int = MAX_RETRIES,
+                 hedge: bool = HEDGE_ENABLED):
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self._latencies = deque(maxlen=_LATENCY_SAMPLES)
+        self.metrics = Counter()
+
+    async def call(self, method: str, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Ejecuta `send` (que hace la petición) aplicando la política. Los
+        errores del último intento se propagan tal cual.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        self.metrics["calls"] += 1
+        for attempt in range(attempts):
+            if attempt:
+                self.metrics["retries"] += 1
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(0, delay))
+            try:
+                self.breaker.allow()
+            except CircuitOpenError:
+                self.metrics["short_circuited"] += 1
+                raise
+            result = await self._attempt(send, hedged=self.hedge and method.upper() == "GET")
+            self.breaker.record(_failed(result))
+            if attempt + 1 < attempts and _retryable(result):
+                continue
+            if isinstance(result, BaseException):
+                self.metrics["failures"] += 1
+                raise result
+            return result
+
+    async def _attempt(self, send, hedged: bool):
+        """
+        Un intento con plazo; retorna la respuesta o la excepción (sin lanzarla).
+        """
+        start = time.monotonic()
+        try:
+            response = await self._within_deadline(self._hedged(send) if hedged else send())
+        except asyncio.TimeoutError:
+            self.metrics["deadline_exceeded"] += 1
+            return DeadlineExceeded(f"Sin respuesta de PocketBase en {self.deadline}s")
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            return e
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        self._latencies.append(time.monotonic() - start)
+        return response
+
+    async def _within_deadline(self, coro):
+        """
+        Como asyncio.wait_for, pero marca el vencimiento antes de cancelar:
+        upstream_call registra esa cancelación como timeout.
+        """
+        deadline = {"exceeded": False}
+        token = _attempt_deadline.set(deadline)
+        try:
+            task = asyncio.ensure_future(coro)
+        finally:
+            _attempt_deadline.reset(token)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=self.deadline)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not done:
+            deadline["exceeded"] = True
+            task.cancel()
+            await asyncio.wait({task})
+            raise asyncio.TimeoutError
+        return task.result()
+
+    def hedge_delay(self) -> float:
+        if len(self._latencies) < 20:
+            return max(HEDGE_MIN_DELAY, self.deadline / 2)
+        ordered = sorted(self._latencies)
+        return max(HEDGE_MIN_DELAY, ordered[int(HEDGE_QUANTILE * (len(ordered) - 1))])
+
+    async def _hedged(self, send) -> httpx.Response:
+        tasks = [asyncio.create_task(send())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay())
+            if not done:
+                self.metrics["hedges"] += 1
+                tasks.append(asyncio.create_task(send()))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.metrics["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # La petición perdedora (o ambas, si se venció el plazo) se cancela
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            **{key: self.metrics[key] for key in (
+                "calls", "retries", "failures", "deadline_exceeded",
+                "short_circuited", "hedges", "hedge_wins",
+            )},
+            "hedge_delay": round(self.hedge_delay(), 4) if self.hedge else None,
+            "breaker": self.breaker.stats(),
+        }
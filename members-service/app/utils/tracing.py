@@ -1,21 +1,46 @@
-# app/tracing.py
+# app/utils/tracing.py
 import os
+from typing import Optional
+
+from fastapi import FastAPI
 from opentelemetry import trace
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+_provider: Optional[TracerProvider] = None
+
+
+def init_tracer() -> TracerProvider:
+    """
+    Configura el TracerProvider con el exportador Jaeger. Es idempotente: las
+    llamadas siguientes retornan el provider ya configurado.
+    """
+    global _provider
+    if _provider is not None:
+        return _provider
 
-def init_tracer():
     # Identificar el servicio
     resource = Resource.create({"service.name": "members-service"})
     provider = TracerProvider(resource=resource)
     trace.set_tracer_provider(provider)
 
-    # Exportador Jaeger
+    # Exportador Jaeger (UDP: no bloquea el arranque aunque el agente no exista)
     jaeger_exporter = JaegerExporter(
         agent_host_name=os.getenv("JAEGER_HOST", "jaeger"),
         agent_port=int(os.getenv("JAEGER_PORT", "6831"))
     )
-    span_processor = BatchSpanProcessor(jaeger_exporter)
-    provider.add_span_processor(span_processor)
+    provider.add_span_processor(BatchSpanProcessor(jaeger_exporter))
+    _provider = provider
+    return provider
+
+
+def setup_telemetry(app: FastAPI):
+    """
+    Inicializa el tracer e instrumenta la app una sola vez.
+    """
+    provider = init_tracer()
+    if not getattr(app, "_is_instrumented_by_opentelemetry", False):
+        FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
@@ -0,0 +1,280 @@
+# benchmarks/members_bench.py
+"""
+Benchmark de carga del members-service contra un PocketBase falso en memoria.
+
+La app FastAPI corre en el mismo proceso y PocketBase se reemplaza por el
+transporte determinista de tests/fake_pocketbase.py, cargado con la cantidad
+de usuarios pedida. Para cada tamaño, escenario y nivel de concurrencia se
+reporta latencia p50/p95/p99, throughput, llamadas a PocketBase y el pico de
+memoria (medido en una pasada aparte con tracemalloc, para no inflar la
+latencia). Los resultados se guardan en JSON para comparar corridas.
+
+Escenarios de lectura:
+- list_cold: cada GET reconstruye la proyección; se corre solo en serie,
+  porque con concurrencia las reconstrucciones se agrupan en una sola.
+- list_cold_burst: en cada tanda se invalida la caché y llegan `concurrency`
+  GET a la vez, que comparten una sola reconstrucción (lo que ve un cliente
+  cuando vence la caché bajo carga).
+- list_cached: GET servidos desde la proyección en caché.
+
+Uso (desde members-service/):
+    python benchmarks/members_bench.py --sizes 30,1000,10000 --concurrency 1,10,50
+    python benchmarks/members_bench.py --compare benchmarks/results/anterior.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+os.environ.setdefault("POCKETBASE_URL", "http://pocketbase.bench")
+os.environ.setdefault("POCKETBASE_ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("POCKETBASE_ADMIN_PASSWORD", "secret")
+os.environ.setdefault("JAEGER_HOST", "localhost")
+# El cliente del benchmark hace de gateway: su X-Real-IP es de confianza
+os.environ.setdefault("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1")
+
+import httpx  # noqa: E402
+from fake_pocketbase import FakePocketBase  # noqa: E402
+
+import main  # noqa: E402
+from app.services import members_service  # noqa: E402
+from app.utils import http_client  # noqa: E402
+
+SCENARIOS = ("list_cold", "list_cold_burst", "list_cached", "create", "update", "delete")
+_client_ips = (f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in itertools.count())
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low, high = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def _headers() -> dict:
+    # Una IP distinta por solicitud (vía el gateway) para no activar el rate limit
+    return {"X-Real-IP": next(_client_ips)}
+
+
+async def _request(client: httpx.AsyncClient, scenario: str, i: int, target):
+    """
+    Una solicitud del escenario; `target` (id de usuario o de rol) se calcula
+    antes de la parte medida.
+    """
+    if scenario.startswith("list_"):
+        if scenario == "list_cold":
+            members_service.members_cache.invalidate()
+        return await client.get("/members/", headers=_headers())
+    if scenario == "create":
+        return await client.post("/members/", headers=_headers(), json={
+            "nombres": f"Nuevo{i}", "apellidos": "Bench", "semestre_ingreso": "2024-1",
+            "rol": target,
+        })
+    if scenario == "update":
+        return await client.patch(f"/members/{target}", headers=_headers(),
+                                  json={"nombres": f"Editado{i}"})
+    return await client.delete(f"/members/{target}", headers=_headers())
+
+
+async def _drive(client, scenario: str, concurrency: int, targets: list, latencies: list) -> int:
+    """
+    Ejecuta una solicitud por elemento de `targets` y retorna cuántas fallaron.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        start = time.perf_counter()
+        response = await _request(client, scenario, i, targets[i])
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+
+    async def limited(i: int):
+        async with semaphore:
+            await one(i)
+
+    if scenario == "list_cold_burst":
+        # Tandas de `concurrency` solicitudes simultáneas tras invalidar la caché
+        for wave in range(0, len(targets), concurrency):
+            members_service.members_cache.invalidate()
+            await asyncio.gather(*(one(i) for i in range(wave, min(wave + concurrency, len(targets)))))
+    else:
+        await asyncio.gather(*(limited(i) for i in range(len(targets))))
+    return errors
+
+
+async def run_scenario(client, fake, scenario: str, concurrency: int, targets: list) -> dict:
+    latencies = []
+    calls_before = sum(fake.calls.values())
+    start = time.perf_counter()
+    errors = await _drive(client, scenario, concurrency, targets, latencies)
+    elapsed = time.perf_counter() - start
+    requests = len(targets)
+    upstream_calls = sum(fake.calls.values()) - calls_before
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_request": round(upstream_calls / requests, 3),
+    }
+
+
+async def peak_memory(client, scenario: str, concurrency: int, targets: list) -> int:
+    """
+    Pico de memoria (bytes, sobre lo ya asignado) de una tanda de `concurrency`
+    solicitudes del escenario.
+    """
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        await _drive(client, scenario, concurrency, targets, [])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def _targets(fake: FakePocketBase, scenario: str, requests: int, concurrency: int):
+    """
+    Objetivos de la pasada de memoria y de la medida, fuera de la parte medida.
+    Cada delete usa un usuario distinto, que existe, para no medir respuestas 404.
+    """
+    if scenario == "create":
+        rol_id = next(iter(fake.collections["rol"]), "")
+        return [rol_id] * concurrency, [rol_id] * requests
+    if scenario in ("update", "delete"):
+        user_ids = list(fake.collections["usuario"])
+        if scenario == "update":
+            return user_ids[:concurrency], [user_ids[i % len(user_ids)] for i in range(requests)]
+        reserved = min(concurrency, len(user_ids))
+        return user_ids[:reserved], user_ids[reserved:reserved + requests]
+    return [None] * concurrency, [None] * requests
+
+
+async def run_size(size: int, concurrencies: list, requests: int, latency_ms: float) -> list:
+    fake = FakePocketBase(latency=latency_ms / 1000)
+    fake.seed(users=size)
+    await http_client.init_client(fake.transport())
+    members_service.members_cache.clear()
+    members_service.token_manager.invalidate()
+    results = []
+    transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/members/", headers=_headers())
+        for scenario in SCENARIOS:
+            for concurrency in concurrencies:
+                if scenario == "list_cold" and concurrency != concurrencies[0]:
+                    continue
+                # Con un solo cliente, la tanda es igual a list_cold
+                if scenario == "list_cold_burst" and concurrency == 1:
+                    continue
+                if scenario == "list_cold":
+                    concurrency = 1
+                # Las reconstrucciones en frío son caras: se limitan con tamaños grandes
+                n = requests
+                if scenario.startswith("list_cold") and size >= 10000:
+                    n = min(requests, 20 * (1 if scenario == "list_cold" else concurrency))
+                memory_targets, targets = _targets(fake, scenario, n, concurrency)
+                if not targets:
+                    print(f"size={size:>6} {scenario:>15} c={concurrency:>3} sin usuarios para borrar")
+                    continue
+                peak = await peak_memory(client, scenario, concurrency, memory_targets)
+                members_service.members_cache.clear()
+                await client.get("/members/", headers=_headers())
+                result = await run_scenario(client, fake, scenario, concurrency, targets)
+                result.update(size=size, peak_memory_bytes=peak)
+                results.append(result)
+                print(
+                    f"size={size:>6} {scenario:>15} c={concurrency:>3} "
+                    f"p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+                    f"p99={result['p99_ms']:8.2f}ms rps={result['throughput_rps']:8.1f} "
+                    f"upstream/req={result['upstream_calls_per_request']:.2f} "
+                    f"errors={result['errors']}"
+                )
+    await http_client.close_client()
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(previous_path: str, results: list):
+    with open(previous_path) as f:
+        previous = {
+            (r["size"], r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]
+        }
+    print(f"\nComparación con {previous_path} (p95 y throughput):")
+    for r in results:
+        old = previous.get((r["size"], r["scenario"], r["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"size={r['size']:>6} {r['scenario']:>15} c={r['concurrency']:>3} "
+            f"p95 {old['p95_ms']:8.2f} -> {r['p95_ms']:8.2f} ms   "
+            f"rps {old['throughput_rps']:8.1f} -> {r['throughput_rps']:8.1f}"
+        )
+
+
+async def main_async(args):
+    sizes = [int(s) for s in args.sizes.split(",")]
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    results = []
+    for size in sizes:
+        results.extend(await run_size(size, concurrencies, args.requests, args.latency_ms))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results",
+        f"members-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="30,1000,10000")
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="latencia simulada de PocketBase por llamada")
+    parser.add_argument("--output", help="ruta del JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    asyncio.run(main_async(parser.parse_args()))
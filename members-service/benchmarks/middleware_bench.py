@@ -0,0 +1,139 @@
+# benchmarks/middleware_bench.py
+"""
+Microbenchmark del costo por solicitud de la pila de middlewares propios
+(security headers + rate limit + correlation ID).
+
+Compara la implementación anterior, basada en BaseHTTPMiddleware y
+@app.middleware("http"), con los middlewares ASGI puros actuales. Las
+solicitudes se envían directamente a la app ASGI, sin red ni cliente HTTP.
+
+Uso (desde members-service/):
+    python benchmarks/middleware_bench.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.middleware.correlation import CorrelationIdMiddleware  # noqa: E402
+from app.middleware.rate_limit_middleware import RateLimitMiddleware  # noqa: E402
+from app.middleware.security_headers import SECURITY_HEADERS, SecurityHeadersMiddleware  # noqa: E402
+
+
+# --- Implementación anterior (BaseHTTPMiddleware), como referencia -----------
+
+class LegacyCorrelationIdMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        correlation_id = request.headers.get("X-Correlation-ID") or str(uuid4())
+        request.state.correlation_id = correlation_id
+        response = await call_next(request)
+        response.headers["X-Correlation-ID"] = correlation_id
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, max_requests: int = 100, window_seconds: int = 60):
+        super().__init__(app)
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.clients = {}
+
+    async def dispatch(self, request, call_next):
+        client_ip = request.client.host
+        current_time = time.time()
+        if client_ip not in self.clients:
+            self.clients[client_ip] = []
+        self.clients[client_ip] = [
+            t for t in self.clients[client_ip] if t > current_time - self.window_seconds
+        ]
+        if len(self.clients[client_ip]) >= self.max_requests:
+            return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded."})
+        self.clients[client_ip].append(current_time)
+        return await call_next(request)
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers.update(dict(SECURITY_HEADERS))
+        return response
+
+
+# --- Apps de prueba ------------------------------------------------------------
+
+async def _health(request):
+    return JSONResponse({"status": "ok", "service": "members-service"})
+
+
+def build_app(stack: str, max_requests: int) -> Starlette:
+    app = Starlette(routes=[Route("/health", _health)])
+    if stack == "legacy":
+        app.add_middleware(LegacyCorrelationIdMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware, max_requests=max_requests)
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+    elif stack == "asgi":
+        app.add_middleware(CorrelationIdMiddleware)
+        app.add_middleware(RateLimitMiddleware, max_requests=max_requests, backend="memory")
+        app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+async def _call(app, client_ip: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health", "raw_path": b"/health",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": (client_ip, 1234), "server": ("bench", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+async def measure(stack: str, requests: int) -> dict:
+    # El límite alto evita que el rate limit corte la medición
+    app = build_app(stack, max_requests=requests * 2)
+    for _ in range(200):
+        await _call(app, "10.0.0.1")
+    start = time.perf_counter()
+    for _ in range(requests):
+        status = await _call(app, "10.0.0.1")
+    elapsed = time.perf_counter() - start
+    assert status == 200
+    return {"stack": stack, "requests": requests, "us_per_request": elapsed / requests * 1e6}
+
+
+async def main(requests: int):
+    results = [await measure(stack, requests) for stack in ("none", "legacy", "asgi")]
+    base = results[0]["us_per_request"]
+    for result in results:
+        result["overhead_us"] = result["us_per_request"] - base
+        print(
+            f"{result['stack']:>7}: {result['us_per_request']:8.1f} µs/solicitud "
+            f"(overhead {result['overhead_us']:7.1f} µs)"
+        )
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
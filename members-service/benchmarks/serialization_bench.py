@@ -0,0 +1,105 @@
+# benchmarks/serialization_bench.py
+"""
+Benchmark de serialización de la lista de miembros: dicts + jsonable_encoder +
+json.dumps (el camino por defecto de FastAPI, usado antes) contra el dataclass
+Member + orjson.
+
+Para cada camino se mide la memoria retenida por la proyección, el tiempo de
+serialización (mejor de N repeticiones) y el pico de memoria al serializar.
+
+Uso (desde members-service/):
+    python benchmarks/serialization_bench.py --members 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.services.member_projection import build_member  # noqa: E402
+
+
+def _users(n: int) -> list:
+    return [
+        {"nombres": f"Nombre{i}", "apellidos": f"Apellido{i}", "semestre_ingreso": f"{2015 + i % 10}-1"}
+        for i in range(n)
+    ]
+
+
+def build_dicts(users: list) -> list:
+    # Forma anterior de la proyección: un dict por miembro
+    members = []
+    for i, user in enumerate(users):
+        member = build_member(user, f"Rol {i % 5}", f"Capitulo {i % 8}")
+        members.append({
+            "perfil": member.perfil, "nombre": member.nombre, "rol": member.rol,
+            "capitulo": member.capitulo, "anio_ingreso": member.anio_ingreso,
+        })
+    return members
+
+
+def build_members(users: list) -> list:
+    return [build_member(user, f"Rol {i % 5}", f"Capitulo {i % 8}") for i, user in enumerate(users)]
+
+
+def serialize_dicts(members: list) -> bytes:
+    return JSONResponse(content=jsonable_encoder({"data": members})).body
+
+
+def serialize_members(members: list) -> bytes:
+    return orjson.dumps({"data": members})
+
+
+def _retained(build, users: list):
+    tracemalloc.start()
+    members = build(users)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return members, retained
+
+
+def _serialize(serialize, members: list, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = serialize(members)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    serialize(members)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return body, best, peak
+
+
+def main(args):
+    users = _users(args.members)
+    results = {}
+    for name, build, serialize in (
+        ("dict+jsonable_encoder", build_dicts, serialize_dicts),
+        ("Member+orjson", build_members, serialize_members),
+    ):
+        members, retained = _retained(build, users)
+        body, seconds, peak = _serialize(serialize, members, args.repeat)
+        results[name] = json.loads(body)
+        print(
+            f"{name:>22}: proyección {retained / 1024:8.1f} KiB  "
+            f"serialización {seconds * 1000:8.2f} ms  pico {peak / 1024:8.1f} KiB  "
+            f"cuerpo {len(body) / 1024:8.1f} KiB"
+        )
+    first, second = results.values()
+    assert first == second, "los dos caminos deben producir el mismo JSON"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
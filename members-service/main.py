@@ -1,30 +1,44 @@
 import logging
-import os
+import time
+
+# Referencia para medir el tiempo de arranque (antes de las importaciones pesadas)
+BOOT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from fastapi.exceptions import RequestValidationError
 
-# Importación de OpenTelemetry para Distributed Tracing
-from opentelemetry import trace
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.exporter.jaeger.thrift import JaegerExporter
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from app.utils.consul_registration import register_service, deregister_service
+from app.utils.admission import ADMISSION_ENABLED, admission_controller
+from app.utils.consul_registration import consul_registrar
+from app.utils.http_client import init_client, close_client
+from app.utils.rate_limiter import trusted_proxies
 
 # Importar los middlewares personalizados
+from app.middleware.admission import AdmissionControlMiddleware
 from app.middleware.correlation import CorrelationIdMiddleware
+from app.middleware.metrics import MetricsMiddleware
 from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.security_headers import SecurityHeadersMiddleware
 
 # Importa el router de members
-from app.controllers.members_controller import router as members_router
-# Importa la función para iniciar el tracer
-from app.utils.tracing import init_tracer
+from app.controllers.members_controller import encoded_members, router as members_router
+from app.services.member_snapshot import member_snapshotter
+from app.services.members_service import members_cache, pocketbase_calls, token_manager
+from app.services.realtime_sync import REALTIME_ENABLED, realtime_subscriber
+# Tracing distribuido con OpenTelemetry (Jaeger)
+from app.utils.tracing import setup_telemetry
+from app.utils.metrics import register_stats, render_latest
+
+# Configuración del logger
+logger = logging.getLogger("uvicorn.error")
+
+# =========================================================
+# 1. Crear instancia de FastAPI e instrumentarla (una sola vez)
+# =========================================================
 app = FastAPI(
     title="Servicio de Miembros",
     description="Microservicio para listar (y CRUD) de miembros desde PocketBase.",
@@ -38,50 +52,38 @@ app = FastAPI(
         "url": "https://opensource.org/licenses/MIT",
     },
 )
-# 1. Inicializa el tracer
-init_tracer()
+setup_telemetry(app)
 
+# =========================================================
+# 2. Arranque y apagado
+# =========================================================
+# Tiempos de arranque (segundos desde BOOT_STARTED)
+boot_timings = {"startup_complete": None, "first_healthy_response": None}
 
-# 3. Instrumenta la app con OpenTelemetry
-FastAPIInstrumentor.instrument_app(app)
-
-# 4. Registra el evento startup para registrar en consul
-# y el shutdown para desregistrar
-
-# Configuración del logger
-logger = logging.getLogger("uvicorn.error")
 @app.on_event("startup")
 async def startup_event():
-    register_service()
+    # Cliente HTTP compartido (pool de conexiones) hacia PocketBase
+    await init_client()
+    # Última proyección persistida: se sirve de inmediato y se valida en segundo plano
+    await member_snapshotter.restore()
+    member_snapshotter.start()
+    # Suscripción opcional a los cambios de PocketBase para mantener la proyección al día
+    if REALTIME_ENABLED:
+        realtime_subscriber.start()
+    # Registro en Consul en segundo plano: el arranque no espera a Consul
+    consul_registrar.start()
+    # IPs de los proxies de confianza (p.ej. nginx_gateway), resueltas fuera de las solicitudes
+    trusted_proxies.start()
+    boot_timings["startup_complete"] = round(time.perf_counter() - BOOT_STARTED, 3)
+    logger.info(f"Arranque completo en {boot_timings['startup_complete']}s")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    deregister_service()
-
-# =========================================================
-# 1. Inicializar Tracer con OpenTelemetry (para Distributed Tracing)
-# =========================================================
-def init_tracer():
-    resource = Resource.create({"service.name": "members-service"})
-    provider = TracerProvider(resource=resource)
-    trace.set_tracer_provider(provider)
-
-    jaeger_exporter = JaegerExporter(
-        agent_host_name=os.getenv("JAEGER_HOST", "jaeger"),
-        agent_port=int(os.getenv("JAEGER_PORT", "6831")),
-    )
-    span_processor = BatchSpanProcessor(jaeger_exporter)
-    provider.add_span_processor(span_processor)
-
-init_tracer()
-
-# =========================================================
-# 2. Crear instancia de FastAPI
-# =========================================================
-
-
-# Instrumentar la app con OpenTelemetry
-FastAPIInstrumentor.instrument_app(app)
+    await consul_registrar.stop()
+    await trusted_proxies.stop()
+    await realtime_subscriber.stop()
+    await member_snapshotter.stop()
+    await close_client()
 
 # =========================================================
 # 3. Configurar Middlewares Globales
@@ -101,28 +103,41 @@ app.add_middleware(CorrelationIdMiddleware)
 # Middleware de Rate Limit para limitar solicitudes por IP
 app.add_middleware(RateLimitMiddleware, max_requests=100, window_seconds=60)
 
-# Middleware de seguridad de headers
-@app.middleware("http")
-async def security_headers(request: Request, call_next):
-    response = await call_next(request)
-    csp = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-        "img-src 'self' data: https://fastapi.tiangolo.com; "
-        "connect-src 'self'; "
-        "frame-ancestors 'self';"
-    )
-    headers_security = {
-        "Strict-Transport-Security": "max-age=31536000; includeSubDomains; preload",
-        "Content-Security-Policy": csp,
-        "X-Content-Type-Options": "nosniff",
-        "X-Frame-Options": "DENY",
-        "X-XSS-Protection": "1; mode=block",
-        "Referrer-Policy": "strict-origin-when-cross-origin"
-    }
-    response.headers.update(headers_security)
-    return response
+# Control de admisión global: acota la concurrencia total y descarta con 503 el exceso
+# (por fuera del rate limit, para que una solicitud descartada no consuma cupo)
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
+# Middleware de seguridad de headers (headers precalculados una sola vez)
+app.add_middleware(SecurityHeadersMiddleware)
+
+# Métricas HTTP (el más externo, para contar también los 429)
+app.add_middleware(MetricsMiddleware)
+
+# Contadores que cada componente ya lleva, leídos solo al hacer scrape de /metrics
+register_stats("cache", members_cache.stats,
+               counters=("hits", "misses", "stale_hits", "refreshes", "errors"), gauges=("age",))
+register_stats("responses", encoded_members.stats, counters=("hits", "misses"), gauges=("entries",))
+register_stats("auth", token_manager.stats,
+               counters=("hits", "refreshes", "invalidations"), gauges=("expires_in",))
+register_stats(
+    "pocketbase", pocketbase_calls.stats,
+    counters=("calls", "retries", "failures", "deadline_exceeded", "short_circuited",
+              "hedges", "hedge_wins"),
+)
+register_stats(
+    "breaker",
+    lambda: {**pocketbase_calls.breaker.stats(),
+             "open": pocketbase_calls.breaker.state != pocketbase_calls.breaker.CLOSED},
+    counters=("rejected",), gauges=("open", "error_rate"),
+)
+register_stats("snapshot", member_snapshotter.stats,
+               counters=("saves", "errors"), gauges=("restored", "age"))
+register_stats("realtime", realtime_subscriber.stats,
+               counters=("events", "resyncs", "reconnects"), gauges=("connected",))
+register_stats("admission", admission_controller.stats,
+               counters=("admitted", "queued_total", "shed", "queue_timeouts", "decreases"),
+               gauges=("limit", "in_flight", "queued", "queued_writes"))
 
 # =========================================================
 # 4. Manejadores de Excepciones Globales
@@ -130,7 +145,10 @@ async def security_headers(request: Request, call_next):
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     logger.error(f"HTTP error: {exc.detail}")
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(
+        status_code=exc.status_code, content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None)
+    )
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -156,5 +174,28 @@ async def root():
 
 @app.get("/health", tags=["Monitoreo"])
 async def health_check():
+    if boot_timings["first_healthy_response"] is None:
+        boot_timings["first_healthy_response"] = round(time.perf_counter() - BOOT_STARTED, 3)
+        logger.info(
+            f"Primera respuesta saludable a {boot_timings['first_healthy_response']}s del arranque"
+        )
     return {"status": "ok", "service": "members-service"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/debug/stats", include_in_schema=False)
+async def debug_stats():
+    return {
+        "auth": token_manager.stats(),
+        "pocketbase": pocketbase_calls.stats(),
+        "cache": members_cache.stats(),
+        "responses": encoded_members.stats(),
+        "realtime": realtime_subscriber.stats(),
+        "snapshot": member_snapshotter.stats(),
+        "admission": admission_controller.stats(),
+        "consul": consul_registrar.stats(),
+        "boot": boot_timings,
+    }
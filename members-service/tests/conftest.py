@@ -0,0 +1,29 @@
+# tests/conftest.py
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Configuración mínima antes de importar la app
+os.environ.setdefault("POCKETBASE_URL", "http://pocketbase.test")
+os.environ.setdefault("POCKETBASE_ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("POCKETBASE_ADMIN_PASSWORD", "secret")
+os.environ.setdefault("JAEGER_HOST", "localhost")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import members_service  # noqa: E402
+from app.utils.resilience import CircuitBreaker  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_service_state():
+    """
+    Cada test arranca con la caché vacía y sin token (cada test usa su propio event loop).
+    """
+    members_service.members_cache.clear()
+    members_service.token_manager.invalidate()
+    members_service.token_manager._lock = asyncio.Lock()
+    members_service.pocketbase_calls.breaker = CircuitBreaker()
+    yield
+    members_service.members_cache.clear()
@@ -0,0 +1,323 @@
+# tests/fake_pocketbase.py
+import asyncio
+import json
+import math
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+import jwt
+
+# Relaciones que se pueden expandir: (colección, campo) -> colección destino
+RELATIONS = {
+    ("usuario", "rol"): "rol",
+    ("usuario_capitulo", "usuario"): "usuario",
+    ("usuario_capitulo", "capitulo"): "capitulo",
+    ("capitulo", "usuario"): "usuario",
+}
+MAX_PER_PAGE = 500
+
+_FILTER_TOKEN = re.compile(r"\s*(\|\||&&|\(|\)|!=|=|~|'(?:[^'\\]|\\.)*'|[\w.]+)")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] + "Z"
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:15]
+
+
+class _SSEStream(httpx.AsyncByteStream):
+    def __init__(self, fake: "FakePocketBase", client_id: str, queue: asyncio.Queue):
+        self._fake = fake
+        self._client_id = client_id
+        self._queue = queue
+
+    async def __aiter__(self):
+        connect = json.dumps({"clientId": self._client_id})
+        yield f"id:{self._client_id}\nevent:PB_CONNECT\ndata:{connect}\n\n".encode()
+        while True:
+            message = await self._queue.get()
+            if message is None:
+                return
+            yield message
+
+    async def aclose(self):
+        self._fake._clients.pop(self._client_id, None)
+
+
+class FakePocketBase:
+    """
+    PocketBase en memoria expuesto como transporte de httpx.
+
+    Soporta auth de administrador, listado paginado con `expand` y `filter`,
+    lectura/creación/edición/borrado de registros y el endpoint realtime (SSE)
+    con suscripciones por colección.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.collections = {"usuario": {}, "rol": {}, "capitulo": {}, "usuario_capitulo": {}}
+        self.calls = Counter()
+        self._clients = {}
+        self._faults = []
+
+    # --- datos -------------------------------------------------------------
+
+    def add(self, collection: str, notify: bool = True, **fields) -> dict:
+        now = _now()
+        record = {"id": _new_id(), "created": now, "updated": now, **fields}
+        self.collections[collection][record["id"]] = record
+        if notify:
+            self._broadcast(collection, "create", record)
+        return record
+
+    def update(self, collection: str, record_id: str, notify: bool = True, **fields) -> dict:
+        record = self.collections[collection][record_id]
+        record.update(fields, updated=_now())
+        if notify:
+            self._broadcast(collection, "update", record)
+        return record
+
+    def delete(self, collection: str, record_id: str, notify: bool = True):
+        record = self.collections[collection].pop(record_id)
+        if notify:
+            self._broadcast(collection, "delete", record)
+
+    def seed(self, users: int, roles: int = 5, chapters: int = 8, relations_per_user: int = 1):
+        """
+        Carga datos deterministas: `users` usuarios repartidos entre los roles y
+        capítulos, con `relations_per_user` relaciones usuario_capitulo cada uno.
+        """
+        rol_ids = [self.add("rol", notify=False, rol=f"Rol {i}")["id"] for i in range(roles)]
+        cap_ids = [
+            self.add("capitulo", notify=False, capitulo=f"Capitulo {i}", descripcion="")["id"]
+            for i in range(chapters)
+        ]
+        for i in range(users):
+            user = self.add(
+                "usuario", notify=False,
+                nombres=f"Nombre{i}", apellidos=f"Apellido{i}",
+                rol=rol_ids[i % roles] if roles else "",
+                semestre_ingreso=f"{2015 + i % 10}-{1 + i % 2}",
+            )
+            for j in range(relations_per_user if chapters else 0):
+                self.add(
+                    "usuario_capitulo", notify=False,
+                    usuario=user["id"], capitulo=cap_ids[(i + j) % chapters],
+                )
+
+    # --- fallas ------------------------------------------------------------
+
+    def inject(self, times: int = 1, status: Optional[int] = None, delay: float = 0.0,
+               error: Optional[Exception] = None):
+        """
+        Las próximas `times` peticiones a colecciones se demoran `delay`
+        segundos y luego fallan con `error` o responden `status` (si se indica).
+        """
+        self._faults.extend([(status, delay, error)] * times)
+
+    # --- realtime ----------------------------------------------------------
+
+    def disconnect_all(self):
+        """
+        Cierra todas las conexiones realtime abiertas.
+        """
+        for queue, _ in list(self._clients.values()):
+            queue.put_nowait(None)
+
+    @property
+    def realtime_clients(self) -> int:
+        return len(self._clients)
+
+    def _broadcast(self, collection: str, action: str, record: dict):
+        data = json.dumps({"action": action, "record": record})
+        for queue, subscriptions in self._clients.values():
+            if collection in subscriptions:
+                queue.put_nowait(f"event:{collection}\ndata:{data}\n\n".encode())
+
+    # --- transporte --------------------------------------------------------
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = request.url.path
+        if path == "/api/admins/auth-with-password":
+            self.calls["auth"] += 1
+            token = jwt.encode({"exp": int(time.time()) + 3600, "type": "admin"}, "secret")
+            return httpx.Response(200, json={"token": token})
+        if path == "/api/realtime":
+            return self._realtime(request)
+
+        match = re.fullmatch(r"/api/collections/(\w+)/records(?:/(\w+))?", path)
+        if not match or match.group(1) not in self.collections:
+            return httpx.Response(404, json={"code": 404, "message": "Not found."})
+        collection, record_id = match.groups()
+        if self._faults:
+            fault_status, delay, error = self._faults.pop(0)
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            if fault_status is not None:
+                self.calls[("fault", fault_status)] += 1
+                return httpx.Response(fault_status, json={"code": fault_status, "message": "Falla."})
+        if not request.headers.get("Authorization"):
+            return httpx.Response(401, json={"code": 401, "message": "Unauthorized."})
+        self.calls[(request.method, collection)] += 1
+        records = self.collections[collection]
+        expand = request.url.params.get("expand", "")
+
+        if record_id is None and request.method == "GET":
+            return self._list(request, collection, expand)
+        if record_id is None and request.method == "POST":
+            record = self.add(collection, **json.loads(request.content))
+            return httpx.Response(200, json=self._expand(collection, record, expand))
+        if record_id not in records:
+            return httpx.Response(404, json={"code": 404, "message": "Not found."})
+        if request.method == "GET":
+            return httpx.Response(200, json=self._expand(collection, records[record_id], expand))
+        if request.method == "PATCH":
+            record = self.update(collection, record_id, **json.loads(request.content))
+            return httpx.Response(200, json=self._expand(collection, record, expand))
+        if request.method == "DELETE":
+            self.delete(collection, record_id)
+            return httpx.Response(204)
+        return httpx.Response(405)
+
+    def _list(self, request: httpx.Request, collection: str, expand: str) -> httpx.Response:
+        params = request.url.params
+        items = list(self.collections[collection].values())
+        items = [item for item in items if self._matches(item, params.get("filter"))]
+        page = int(params.get("page", 1))
+        per_page = min(int(params.get("perPage", 30)), MAX_PER_PAGE)
+        page_items = items[(page - 1) * per_page: page * per_page]
+        body = {
+            "page": page,
+            "perPage": per_page,
+            "items": [self._expand(collection, item, expand) for item in page_items],
+        }
+        if params.get("skipTotal") in ("1", "true"):
+            body.update(totalItems=-1, totalPages=-1)
+        else:
+            body.update(totalItems=len(items), totalPages=max(1, math.ceil(len(items) / per_page)))
+        return httpx.Response(200, json=body)
+
+    def _matches(self, record: dict, filter_expr: Optional[str]) -> bool:
+        """
+        Evalúa un subconjunto de la sintaxis de filtros de PocketBase: `=`, `!=`
+        y `~` (LIKE sin distinguir mayúsculas ASCII), `&&`, `||`, paréntesis y campos
+        de relaciones con punto (p.ej. `rol.rol`).
+        """
+        if not filter_expr:
+            return True
+        tokens = _FILTER_TOKEN.findall(filter_expr)
+        position = 0
+
+        def peek():
+            return tokens[position] if position < len(tokens) else None
+
+        def take():
+            nonlocal position
+            position += 1
+            return tokens[position - 1]
+
+        def parse_or():
+            result = parse_and()
+            while peek() == "||":
+                take()
+                result = parse_and() or result
+            return result
+
+        def parse_and():
+            result = parse_term()
+            while peek() == "&&":
+                take()
+                result = parse_term() and result
+            return result
+
+        def parse_term():
+            if peek() == "(":
+                take()
+                result = parse_or()
+                take()
+                return result
+            field, operator, literal = take(), take(), take()
+            expected = re.sub(r"\\(.)", r"\1", literal[1:-1])
+            values = self._resolve(record, field)
+            if operator == "~":
+                # Como el LIKE de SQLite: comodines % y _, mayúsculas solo en ASCII
+                pattern = expected if "%" in expected else f"%{expected}%"
+                regex = re.compile(
+                    "^" + "".join(
+                        ".*" if char == "%" else "." if char == "_" else re.escape(char)
+                        for char in pattern
+                    ) + "$",
+                    re.IGNORECASE | re.ASCII | re.DOTALL
+                )
+                return any(regex.match(str(value)) for value in values)
+            matched = expected in values or (expected == "" and not values)
+            return matched if operator == "=" else not matched
+
+        return parse_or()
+
+    def _resolve(self, record: dict, path: str) -> list:
+        """
+        Valores de un campo (siguiendo relaciones con punto) como lista.
+        """
+        collection_records = [(self._collection_of(record), record)]
+        parts = path.split(".")
+        for part in parts[:-1]:
+            following = []
+            for collection, item in collection_records:
+                target = RELATIONS.get((collection, part))
+                for related_id in (item.get(part) if isinstance(item.get(part), list)
+                                   else [item.get(part)]):
+                    related = self.collections.get(target, {}).get(related_id)
+                    if related is not None:
+                        following.append((target, related))
+            collection_records = following
+        values = []
+        for _, item in collection_records:
+            value = item.get(parts[-1])
+            values.extend(value if isinstance(value, list) else [value] if value not in (None, "") else [])
+        return values
+
+    def _collection_of(self, record: dict) -> Optional[str]:
+        for name, records in self.collections.items():
+            if records.get(record.get("id")) is record:
+                return name
+        return None
+
+    def _expand(self, collection: str, record: dict, expand: str) -> dict:
+        expanded = {}
+        for field in filter(None, expand.split(",")):
+            target = RELATIONS.get((collection, field))
+            related = self.collections.get(target, {}).get(record.get(field))
+            if related is not None:
+                expanded[field] = related
+        return {**record, "expand": expanded} if expanded else dict(record)
+
+    def _realtime(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            client_id = _new_id()
+            queue = asyncio.Queue()
+            self._clients[client_id] = (queue, set())
+            return httpx.Response(
+                200, headers={"Content-Type": "text/event-stream"},
+                stream=_SSEStream(self, client_id, queue),
+            )
+        body = json.loads(request.content)
+        client = self._clients.get(body.get("clientId"))
+        if client is None:
+            return httpx.Response(404, json={"code": 404, "message": "Missing or invalid client id."})
+        client[1].clear()
+        client[1].update(body.get("subscriptions", []))
+        return httpx.Response(204)
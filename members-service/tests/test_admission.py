@@ -0,0 +1,148 @@
+# tests/test_admission.py
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.middleware.admission import AdmissionControlMiddleware
+from app.utils.admission import READ, WRITE, AdmissionController
+
+
+def test_queue_prioritizes_writes_and_sheds_excess_reads():
+    async def scenario():
+        controller = AdmissionController(initial_limit=1, min_limit=1, max_limit=1, queue_size=2,
+                                         queue_timeout=1.0)
+        assert await controller.acquire(READ)
+
+        queued_read = asyncio.ensure_future(controller.acquire(READ))
+        newest_read = asyncio.ensure_future(controller.acquire(READ))
+        await asyncio.sleep(0)
+        assert controller.queued == 2
+        # Cola llena: otra lectura se rechaza al instante...
+        assert not await controller.acquire(READ)
+        # ...pero una escritura desplaza a la lectura encolada más nueva
+        write = asyncio.ensure_future(controller.acquire(WRITE))
+        await asyncio.sleep(0)
+        assert await newest_read is False
+
+        # Al liberarse el cupo pasa primero la escritura, aunque llegó después
+        controller.release(0.01)
+        assert await write
+        assert not queued_read.done()
+        controller.release(0.01)
+        assert await queued_read
+        assert controller.stats()["shed"] == 2 and controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_limit_adapts_to_latency():
+    controller = AdmissionController(initial_limit=10, min_limit=2, max_limit=12,
+                                     latency_target=0.5)
+    controller.in_flight = 10
+    controller.release(0.01)
+    assert 10 < controller.limit < 11
+
+    controller.in_flight = 5
+    controller.release(2.0)
+    assert controller.limit < 10 and controller.decreases == 1
+    # A lo sumo una reducción por `latency_target`
+    limit = controller.limit
+    controller.release(2.0)
+    assert controller.limit == limit
+
+
+def test_middleware_answers_503_with_retry_after_when_overloaded():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return PlainTextResponse("ok")
+
+        async def health(request):
+            return PlainTextResponse("ok")
+
+        controller = AdmissionController(initial_limit=1, min_limit=1, queue_size=0)
+        app = AdmissionControlMiddleware(
+            Starlette(routes=[Route("/members/", slow), Route("/health", health)]), controller
+        )
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://test") as client:
+            first = asyncio.ensure_future(client.get("/members/"))
+            while controller.in_flight == 0:
+                await asyncio.sleep(0)
+            shed = await client.get("/members/")
+            assert shed.status_code == 503 and shed.headers["Retry-After"] == "1"
+            assert (await client.get("/health")).status_code == 200
+            release.set()
+            assert (await first).status_code == 200
+        assert controller.stats()["shed"] == 1 and controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_write_skips_reads_that_already_left_the_queue():
+    async def scenario():
+        controller = AdmissionController(initial_limit=1, min_limit=1, max_limit=1, queue_size=1,
+                                         queue_timeout=0.05)
+        assert await controller.acquire(READ)
+        read = asyncio.ensure_future(controller.acquire(READ))
+        await asyncio.sleep(0)
+        waiter = controller._waiters[READ][-1]
+
+        # El cliente se desconecta: su waiter queda cancelado antes de salir de la cola
+        read.cancel()
+        while not waiter.done():
+            await asyncio.sleep(0)
+        assert controller.queued == 0
+        # La escritura no intenta desplazarlo: se encola y vence por timeout
+        assert await controller.acquire(WRITE) is False
+        await asyncio.gather(read, return_exceptions=True)
+        assert read.cancelled()
+        assert controller.stats()["queue_timeouts"] == 1 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_only_upstream_failures_signal_congestion():
+    async def scenario():
+        async def fail(request):
+            return PlainTextResponse("error", status_code=int(request.path_params["status"]))
+
+        controller = AdmissionController(initial_limit=10, min_limit=2, latency_target=60)
+        app = AdmissionControlMiddleware(
+            Starlette(routes=[Route("/members/{status:int}", fail)]), controller
+        )
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://test") as client:
+            for code in (400, 404, 500):
+                await client.get(f"/members/{code}")
+            assert controller.decreases == 0
+            await client.get("/members/503")
+            assert controller.decreases == 1 and controller.limit < 10
+
+    asyncio.run(scenario())
+
+
+def test_write_is_not_queued_behind_a_cancelled_write():
+    async def scenario():
+        controller = AdmissionController(initial_limit=1, min_limit=1, max_limit=2, queue_size=4,
+                                         queue_timeout=1.0)
+        assert await controller.acquire(READ)
+        write = asyncio.ensure_future(controller.acquire(WRITE))
+        await asyncio.sleep(0)
+        waiter = controller._waiters[WRITE][-1]
+
+        # Se abre un cupo justo cuando la escritura encolada ya se canceló
+        write.cancel()
+        while not waiter.done():
+            await asyncio.sleep(0)
+        controller.limit = 2
+        assert await asyncio.wait_for(controller.acquire(WRITE), 0.1)
+        await asyncio.gather(write, return_exceptions=True)
+        assert controller.in_flight == 2 and controller.queued == 0
+
+    asyncio.run(scenario())
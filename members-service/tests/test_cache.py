@@ -0,0 +1,75 @@
+# tests/test_cache.py
+import asyncio
+
+import pytest
+
+from app.utils.cache import StaleWhileRevalidateCache
+
+
+class Loader:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("PocketBase caído")
+        return self.calls
+
+
+def test_concurrent_cold_misses_trigger_one_rebuild():
+    async def scenario():
+        loader = Loader(delay=0.05)
+        cache = StaleWhileRevalidateCache(loader, ttl=60)
+        results = await asyncio.gather(*(cache.get() for _ in range(50)))
+        assert loader.calls == 1
+        assert {(r.value, r.status) for r in results} == {(1, "MISS")}
+        assert cache.stats()["misses"] == 50 and cache.stats()["refreshes"] == 1
+
+        assert (await cache.get()).status == "HIT"
+
+    asyncio.run(scenario())
+
+
+def test_stale_value_is_served_while_one_background_refresh_runs():
+    async def scenario():
+        loader = Loader(delay=0.05)
+        cache = StaleWhileRevalidateCache(loader, ttl=0.01, stale_ttl=60)
+        await cache.get()
+        await asyncio.sleep(0.02)
+
+        results = await asyncio.gather(*(cache.get() for _ in range(10)))
+        assert {(r.value, r.status) for r in results} == {(1, "STALE")}
+        await asyncio.sleep(0.1)
+        assert loader.calls == 2
+        assert (await cache.get()).value == 2
+
+    asyncio.run(scenario())
+
+
+def test_last_value_is_served_when_the_reload_fails_or_is_slow():
+    async def scenario():
+        loader = Loader()
+        cache = StaleWhileRevalidateCache(loader, ttl=60, stale_if_slow=0.05)
+        await cache.get()
+
+        loader.fail = True
+        cache.invalidate()
+        result = await cache.get()
+        assert (result.value, result.status) == (1, "STALE")
+        assert cache.stats()["errors"] == 1
+
+        loader.fail, loader.delay = False, 1.0
+        cache.invalidate()
+        result = await cache.get()
+        assert (result.value, result.status) == (1, "STALE")
+
+        # Sin valor previo, el error se propaga
+        loader.fail, loader.delay = True, 0.0
+        with pytest.raises(RuntimeError):
+            await StaleWhileRevalidateCache(loader, ttl=60).get()
+
+    asyncio.run(scenario())
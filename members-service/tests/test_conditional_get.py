@@ -0,0 +1,69 @@
+# tests/test_conditional_get.py
+import asyncio
+import gzip
+import json
+
+import httpx
+from fake_pocketbase import FakePocketBase
+
+import main
+from app.utils import http_client
+
+
+def test_members_listing_conditional_get_and_precompressed_variants():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=40, roles=3, chapters=4)
+        await http_client.init_client(fake.transport())
+        transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                plain = await client.get("/members/", headers={"Accept-Encoding": "identity"})
+                assert plain.status_code == 200
+                assert "content-encoding" not in plain.headers
+                etag, last_modified = plain.headers["etag"], plain.headers["last-modified"]
+                assert len(plain.json()["data"]) == 40
+
+                # Variante gzip precalculada, con su propio ETag y sin doble compresión
+                raw = await client.send(
+                    client.build_request("GET", "/members/", headers={"Accept-Encoding": "gzip"}),
+                    stream=True,
+                )
+                body = b"".join([chunk async for chunk in raw.aiter_raw()])
+                assert raw.headers["content-encoding"] == "gzip"
+                assert raw.headers["etag"] != etag
+                assert json.loads(gzip.decompress(body)) == plain.json()
+
+                calls = sum(fake.calls.values())
+                for headers in ({"If-None-Match": etag},
+                                {"If-None-Match": raw.headers["etag"]},
+                                {"If-Modified-Since": last_modified}):
+                    cached = await client.get("/members/", headers=headers)
+                    assert cached.status_code == 304
+                    assert cached.content == b""
+                assert sum(fake.calls.values()) == calls
+
+                user_id = next(iter(fake.collections["usuario"]))
+                await client.patch(f"/members/{user_id}", json={"nombres": "Zoe"})
+                changed = await client.get("/members/", headers={"If-None-Match": etag})
+                assert changed.status_code == 200
+                assert changed.headers["etag"] != etag
+                # If-None-Match manda: con un ETag viejo no vale una fecha reciente
+                newer = await client.get("/members/", headers={
+                    "If-None-Match": etag, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT",
+                })
+                assert newer.status_code == 200
+
+                # Una baja también invalida If-Modified-Since
+                last_modified = changed.headers["last-modified"]
+                await asyncio.sleep(1)
+                await client.delete(f"/members/{user_id}")
+                after_delete = await client.get(
+                    "/members/", headers={"If-Modified-Since": last_modified}
+                )
+                assert after_delete.status_code == 200
+                assert len(after_delete.json()["data"]) == 39
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+# tests/test_consul_registration.py
+import asyncio
+
+import httpx
+
+from app.utils import consul_registration
+from app.utils.consul_registration import ConsulRegistrar
+
+
+def test_registration_retries_in_background_and_reregisters(monkeypatch):
+    monkeypatch.setattr(consul_registration, "CONSUL_RETRY_MIN_DELAY", 0.01)
+    monkeypatch.setattr(consul_registration, "CONSUL_CHECK_INTERVAL", 0.01)
+    state = {"down": 2, "services": set()}
+
+    async def consul(request: httpx.Request) -> httpx.Response:
+        if state["down"]:
+            state["down"] -= 1
+            raise httpx.ConnectError("Consul no responde", request=request)
+        path = request.url.path
+        if path == "/v1/agent/service/register":
+            state["services"].add(consul_registration.SERVICE_ID)
+            return httpx.Response(200)
+        if path.startswith("/v1/agent/service/deregister/"):
+            state["services"].discard(path.rsplit("/", 1)[-1])
+            return httpx.Response(200)
+        service_id = path.rsplit("/", 1)[-1]
+        return httpx.Response(200 if service_id in state["services"] else 404)
+
+    async def wait_until(predicate):
+        for _ in range(200):
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("timeout esperando la condición")
+
+    async def scenario():
+        registrar = ConsulRegistrar(transport=httpx.MockTransport(consul))
+        registrar.start()  # no espera a Consul
+        await wait_until(lambda: registrar.registered)
+        assert registrar.failures == 2
+
+        # Consul se reinicia y pierde el registro: se vuelve a registrar
+        state["services"].clear()
+        await wait_until(lambda: registrar.registrations == 2)
+
+        await registrar.stop()
+        assert not state["services"]
+
+    asyncio.run(scenario())
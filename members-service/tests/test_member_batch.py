@@ -0,0 +1,116 @@
+# tests/test_member_batch.py
+import asyncio
+import json
+
+import httpx
+from fake_pocketbase import FakePocketBase
+
+import main
+from app.services import members_service
+from app.services.member_batch import BATCH_CONCURRENCY
+from app.utils import http_client
+
+
+def test_ndjson_batch_reports_each_item_and_updates_projection():
+    async def scenario():
+        fake = FakePocketBase(latency=0.005)
+        fake.seed(users=5, roles=2, chapters=2)
+        await http_client.init_client(fake.transport())
+        transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/members/")
+                existing = list(fake.collections["usuario"])
+                operations = [
+                    {"op": "create", "data": {"nombres": f"Nuevo{i}", "apellidos": "Lote",
+                                              "semestre_ingreso": "2025-1"}}
+                    for i in range(20)
+                ]
+                operations += [
+                    {"op": "update", "id": existing[0], "data": {"nombres": "Zoe"}},
+                    {"op": "delete", "id": existing[1]},
+                    {"op": "delete", "id": "noexiste"},
+                    {"op": "rename", "id": existing[2]},
+                ]
+
+                async def body():
+                    for operation in operations:
+                        yield (json.dumps(operation) + "\n").encode()
+                    yield b"{no es json\n"
+
+                response = await client.post(
+                    "/members/batch", content=body(),
+                    headers={"Content-Type": "application/x-ndjson"},
+                )
+                assert response.headers["content-type"].startswith("application/x-ndjson")
+                results = {
+                    item["index"]: item
+                    for item in map(json.loads, response.text.splitlines())
+                }
+            # La proyección en caché ya refleja las escrituras del lote
+            expected = await members_service.get_all_members()
+            assert members_service.members_cache.peek().members() == expected
+            assert len(expected) == 5 + 20 - 1
+        finally:
+            await http_client.close_client()
+
+        assert sorted(results) == list(range(len(operations) + 1))
+        assert all(results[i]["status"] == 200 for i in range(20))
+        assert results[20]["status"] == 200 and results[20]["data"]["nombres"] == "Zoe"
+        assert results[21]["status"] == 204
+        assert results[22]["status"] == 404
+        assert results[23]["status"] == 400 and results[24]["status"] == 400
+        # Un solo login para todo el lote
+        assert fake.calls["auth"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_ndjson_batch_streams_each_line_even_if_client_accepts_gzip():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=2)
+        await http_client.init_client(fake.transport())
+        requests = asyncio.Queue()
+        messages = []
+        first_line = asyncio.Event()
+
+        async def receive():
+            return await requests.get()
+
+        async def send(message):
+            messages.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_line.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/members/batch", "raw_path": b"/members/batch",
+            "root_path": "", "query_string": b"", "client": ("127.0.0.1", 50000),
+            "server": ("test", 80),
+            "headers": [(b"host", b"test"), (b"accept-encoding", b"gzip"),
+                        (b"content-type", b"application/x-ndjson")],
+        }
+        operation = {"op": "create", "data": {"nombres": "Uno" * 500, "apellidos": "Lote",
+                                              "semestre_ingreso": "2025-1"}}
+        try:
+            app = asyncio.create_task(main.app(scope, receive, send))
+            # Una tanda completa de operaciones en vuelo: la primera que termina se responde
+            await requests.put({"type": "http.request", "more_body": True,
+                                "body": (json.dumps(operation) + "\n").encode() * BATCH_CONCURRENCY})
+            # La primera línea llega mientras el lote sigue abierto
+            await asyncio.wait_for(first_line.wait(), 5)
+            assert not app.done()
+            start = messages[0]
+            headers = {name.decode(): value.decode() for name, value in start["headers"]}
+            assert headers.get("content-encoding") != "gzip"
+            first = json.loads(messages[1]["body"].splitlines()[0])
+            assert first["status"] == 200
+
+            await requests.put({"type": "http.request", "more_body": False,
+                                "body": (json.dumps(operation) + "\n").encode()})
+            await asyncio.wait_for(app, 5)
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
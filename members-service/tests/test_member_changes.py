@@ -0,0 +1,108 @@
+# tests/test_member_changes.py
+import asyncio
+
+import httpx
+from fake_pocketbase import FakePocketBase
+
+import main
+from app.services import members_service
+from app.services.member_projection import MemberIndex
+from app.utils import http_client
+
+
+def _apply(replica: dict, changes: dict):
+    if changes["reset"]:
+        replica.clear()
+    for member in changes["upserted"]:
+        replica[member["id"]] = {key: value for key, value in member.items() if key != "id"}
+    for user_id in changes["deleted"]:
+        replica.pop(user_id, None)
+
+
+async def _truth() -> dict:
+    index = await members_service._load_member_index()
+    return {
+        user_id: {"perfil": m.perfil, "nombre": m.nombre, "rol": m.rol,
+                  "capitulo": m.capitulo, "anio_ingreso": m.anio_ingreso}
+        for user_id, m in index.changes_since(None)["upserted"]
+    }
+
+
+def test_snapshot_plus_deltas_matches_full_listing():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=20, roles=3, chapters=4, relations_per_user=2)
+        await http_client.init_client(fake.transport())
+        transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+        users = list(fake.collections["usuario"])
+        rels = list(fake.collections["usuario_capitulo"].values())
+        rol_id = next(iter(fake.collections["rol"]))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                async def sync(cursor):
+                    res = await client.get("/members/changes", params={"since": cursor} if cursor else None)
+                    assert res.status_code == 200
+                    return res.json()
+
+                # Snapshot inicial
+                replica = {}
+                changes = await sync(None)
+                assert changes["reset"] and len(changes["upserted"]) == 20
+                _apply(replica, changes)
+                cursor = changes["cursor"]
+
+                # Sin cambios: respuesta vacía y el mismo cursor
+                changes = await sync(cursor)
+                assert not changes["reset"] and changes["upserted"] == changes["deleted"] == []
+                assert changes["cursor"] == cursor
+
+                steps = [
+                    # Escrituras por la API (se aplican sobre la proyección en caché)
+                    lambda: members_service.create_member({"nombres": "Ana", "apellidos": "Paz"}),
+                    lambda: members_service.update_member(users[1], {"nombres": "Beto"}),
+                    lambda: members_service.delete_member(users[2]),
+                ]
+                for step in steps:
+                    await step()
+                    changes = await sync(cursor)
+                    assert not changes["reset"] and len(changes["upserted"]) + len(changes["deleted"]) == 1
+                    _apply(replica, changes)
+                    cursor = changes["cursor"]
+                    assert replica == await _truth()
+
+                # Cambios directos en PocketBase, vistos en una recarga completa:
+                # baja de usuario, renombre de rol, baja de relación (el usuario
+                # pasa a su segunda relación) y un 'updated' que llega "tarde"
+                fake.delete("usuario", users[3], notify=False)
+                fake.update("rol", rol_id, notify=False, rol="Renombrado")
+                fake.delete("usuario_capitulo", rels[8]["id"], notify=False)
+                fake.update("usuario", users[5], notify=False, nombres="Tardio")
+                fake.collections["usuario"][users[5]]["updated"] = "2000-01-01 00:00:00.000Z"
+                members_service.members_cache.invalidate()
+
+                changes = await sync(cursor)
+                assert not changes["reset"] and changes["deleted"] == [users[3]]
+                upserted = {member["id"] for member in changes["upserted"]}
+                assert {users[0], users[4], users[5]} <= upserted and users[7] not in upserted
+                _apply(replica, changes)
+                assert replica == await _truth()
+
+                # El historial sobrevive al snapshot persistido; un cursor ajeno reinicia
+                restored = MemberIndex.from_snapshot(members_service.members_cache.peek().snapshot())
+                assert not restored.changes_since(changes["cursor"])["reset"]
+                assert (await sync("otro-cursor"))["reset"]
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_changes_need_the_member_cache(monkeypatch):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+        monkeypatch.setattr(members_service, "MEMBERS_CACHE_ENABLED", False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/members/changes")
+        assert response.status_code == 501
+
+    asyncio.run(scenario())
@@ -0,0 +1,139 @@
+# tests/test_member_snapshot.py
+import asyncio
+import os
+import time
+
+import httpx
+from fake_pocketbase import FakePocketBase
+
+from app.services import members_service
+from app.services.member_projection import USER_FIELDS
+from app.services.member_snapshot import MemberSnapshotter, read_snapshot, write_snapshot
+from app.utils import http_client
+
+
+def test_snapshot_warm_start_serves_immediately_and_validates(tmp_path):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=30, roles=3, chapters=4, relations_per_user=2)
+        path = str(tmp_path / "members.json.gz")
+        await http_client.init_client(fake.transport())
+        try:
+            # Datos personales que la proyección no usa: no llegan al snapshot
+            first_id = next(iter(fake.collections["usuario"]))
+            fake.update("usuario", first_id, notify=False, email_u="zoe@example.com",
+                        email_p="zoe@personal.example.com", numero="70000000")
+            loaded = (await members_service.get_cached_members()).value
+            assert await MemberSnapshotter(members_service.members_cache, path).save()
+            saved_users = read_snapshot(path)["index"]["users"]
+            assert all(set(user) <= set(USER_FIELDS) for user in saved_users)
+
+            # "Reinicio": caché vacía y PocketBase lento al despertar
+            members_service.members_cache.clear()
+            fake.latency = 0.2
+            snapshotter = MemberSnapshotter(members_service.members_cache, path)
+            assert await snapshotter.restore()
+            calls = sum(fake.calls.values())
+            # Se sirve de inmediato, como STALE y con su antigüedad, mientras se valida
+            result = await members_service.get_cached_members()
+            assert result.status == "STALE" and sum(fake.calls.values()) == calls
+            assert result.age >= members_service.members_cache.ttl
+            restored = result.value
+            assert restored.members() == loaded.members()
+            assert restored.last_modified == loaded.last_modified
+
+            # La validación en segundo plano confirma que los datos no cambiaron
+            await snapshotter._validation_task
+            assert snapshotter.validation == "current"
+            assert (await members_service.get_cached_members()).status == "HIT"
+            assert members_service.members_cache.peek().last_modified == loaded.last_modified
+
+            # El índice restaurado admite los cambios incrementales igual que el original
+            user = next(iter(fake.collections["usuario"].values()))
+            for index in (loaded, restored):
+                index.upsert_user({**user, "nombres": "Zoe"})
+            assert restored.members() == loaded.members()
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_aged_snapshot_is_served_without_waiting_for_pocketbase(tmp_path):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10)
+        path = str(tmp_path / "members.json.gz")
+        await http_client.init_client(fake.transport())
+        try:
+            await members_service.get_cached_members()
+            await MemberSnapshotter(members_service.members_cache, path).save()
+            # Deploy sin cambios por un buen rato: snapshot más viejo que ttl + stale_ttl
+            payload = read_snapshot(path)
+            cache = members_service.members_cache
+            age = cache.ttl + cache.stale_ttl + 1000
+            write_snapshot(path, {**payload, "saved_at": time.time() - age})
+            cache.clear()
+
+            fake.latency = 0.5
+            snapshotter = MemberSnapshotter(cache, path)
+            assert await snapshotter.restore()
+            calls = sum(fake.calls.values())
+            start = time.perf_counter()
+            result = await members_service.get_cached_members()
+            assert time.perf_counter() - start < 0.2
+            assert result.status == "STALE" and result.age >= age and len(result.value) == 10
+            assert sum(fake.calls.values()) == calls
+
+            await snapshotter._validation_task
+            assert snapshotter.validation == "current"
+            assert (await members_service.get_cached_members()).status == "HIT"
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_snapshot_is_last_known_good_when_pocketbase_is_down(tmp_path):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=8)
+        path = str(tmp_path / "members.json.gz")
+        await http_client.init_client(fake.transport())
+        try:
+            await members_service.get_cached_members()
+            await MemberSnapshotter(members_service.members_cache, path).save()
+            members_service.members_cache.clear()
+
+            fake.inject(times=100, error=httpx.ConnectError("PocketBase caído"))
+            snapshotter = MemberSnapshotter(members_service.members_cache, path)
+            assert await snapshotter.restore()
+            await snapshotter._validation_task
+            assert snapshotter.validation == "failed"
+
+            members_service.members_cache.invalidate()
+            result = await members_service.get_cached_members()
+            assert result.status == "STALE" and len(result.value) == 8
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_snapshot_older_than_max_age_or_corrupt_is_ignored(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "members.json.gz")
+        write_snapshot(path, {"format": 1, "saved_at": time.time() - 120, "version": 1,
+                              "digest": "", "index": {}})
+        assert read_snapshot(path)["version"] == 1
+        snapshotter = MemberSnapshotter(members_service.members_cache, path, max_age=60)
+        assert not await snapshotter.restore()
+
+        with open(path, "r+b") as f:
+            f.seek(os.path.getsize(path) // 2)
+            f.write(b"\x00\x00\x00\x00")
+        snapshotter.max_age = 3600
+        assert not await snapshotter.restore()
+        assert snapshotter.errors == 1 and not members_service.members_cache.has_value
+
+    asyncio.run(scenario())
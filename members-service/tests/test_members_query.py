@@ -0,0 +1,98 @@
+# tests/test_members_query.py
+import asyncio
+
+import httpx
+import pytest
+from fake_pocketbase import FakePocketBase
+
+import main
+from app.services import members_service
+from app.utils import http_client
+
+QUERIES = [
+    {},
+    {"rol": "Rol 1"},
+    {"rol": "Miembro"},
+    {"anio_ingreso": "2"},
+    {"search": "nombre1"},
+    {"search": "Nombre2 Apellido2"},
+    {"rol": "Rol 2", "anio_ingreso": "1", "page": 2, "per_page": 3},
+    {"capitulo": "Capitulo 3", "search": "apellido"},
+    {"page": 3, "per_page": 25},
+    # Casos en que el LIKE de PocketBase difiere del índice en memoria
+    {"search": "ñ"},
+    {"search": "PEÑA"},
+    {"search": "%"},
+    {"search": "_"},
+    {"anio_ingreso": "abc"},
+    {"anio_ingreso": "ABC"},
+    {"rol": "Miembro", "page": 1, "per_page": 5},
+    {"rol": "No existe"},
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_pushdown_matches_in_memory_index(query, monkeypatch):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=60, roles=3, chapters=4, relations_per_user=2)
+        fake.add("usuario", notify=False, nombres="Sin", apellidos="Rol", rol="",
+                 semestre_ingreso="2")
+        # Un rol llamado 'Miembro' y un usuario cuyo rol ya no existe
+        miembro = fake.add("rol", notify=False, rol="Miembro")
+        fake.add("usuario", notify=False, nombres="Íñigo", apellidos="Peña",
+                 rol=miembro["id"], semestre_ingreso="2020-ABC")
+        fake.add("usuario", notify=False, nombres="100%", apellidos="Under_score",
+                 rol="rolborrado0000", semestre_ingreso="2021-abc")
+        await http_client.init_client(fake.transport())
+        try:
+            monkeypatch.setattr(members_service, "MEMBERS_CACHE_ENABLED", True)
+            cached = await members_service.query_members(**query)
+            monkeypatch.setattr(members_service, "MEMBERS_CACHE_ENABLED", False)
+            pushed = await members_service.query_members(**query)
+        finally:
+            await http_client.close_client()
+        assert cached.cache is not None and pushed.cache is None
+        assert (pushed.items, pushed.total) == (cached.items, cached.total)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("query", [
+    {"page": 1, "per_page": 600},
+    {"page": 2, "per_page": 600},
+    {"page": 2, "per_page": 700, "rol": "Rol 1"},
+    {"page": 3, "per_page": 1000},
+])
+def test_pushdown_pages_larger_than_pocketbase_max(query, monkeypatch):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=1600, roles=2, chapters=4)
+        await http_client.init_client(fake.transport())
+        try:
+            monkeypatch.setattr(members_service, "MEMBERS_CACHE_ENABLED", True)
+            cached = await members_service.query_members(**query)
+            monkeypatch.setattr(members_service, "MEMBERS_CACHE_ENABLED", False)
+            pushed = await members_service.query_members(**query)
+        finally:
+            await http_client.close_client()
+        assert (pushed.items, pushed.total) == (cached.items, cached.total)
+
+    asyncio.run(scenario())
+
+
+def test_empty_unpaginated_listing_reports_a_valid_page_size():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=5)
+        await http_client.init_client(fake.transport())
+        transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return (await client.get("/members/", params={"q": "nadie"})).json()
+        finally:
+            await http_client.close_client()
+
+    body = asyncio.run(scenario())
+    assert body["data"] == [] and body["totalItems"] == 0
+    assert body["perPage"] == 1 and body["totalPages"] == 1
@@ -0,0 +1,177 @@
+# tests/test_members_service.py
+import asyncio
+import math
+
+import httpx
+import pytest
+from fake_pocketbase import FakePocketBase
+
+from app.services import members_service
+from app.utils import http_client
+
+
+def test_member_listing_batches_relation_lookups():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=1200, roles=3, chapters=4, relations_per_user=2)
+        await http_client.init_client(fake.transport())
+        try:
+            members = await members_service.get_all_members()
+        finally:
+            await http_client.close_client()
+
+        # Una consulta por página de cada colección, no una por usuario
+        assert fake.calls[("GET", "usuario")] == math.ceil(1200 / 500)
+        assert fake.calls[("GET", "usuario_capitulo")] == math.ceil(2400 / 500)
+        assert len(members) == 1200
+        # Se usa la primera relación de cada usuario
+        assert [m.capitulo for m in members[:5]] == [f"Capitulo {i % 4}" for i in range(5)]
+        assert [m.rol for m in members[:4]] == ["Rol 0", "Rol 1", "Rol 2", "Rol 0"]
+
+    asyncio.run(scenario())
+
+
+def test_service_calls_reuse_the_shared_client(monkeypatch):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=5)
+        shared = await http_client.init_client(fake.transport())
+        created = []
+        original_init = httpx.AsyncClient.__init__
+
+        def counting_init(self, *args, **kwargs):
+            created.append(self)
+            original_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(httpx.AsyncClient, "__init__", counting_init)
+        try:
+            await members_service.get_all_members()
+            member = await members_service.create_member({"nombres": "Ana"})
+            await members_service.update_member(member["id"], {"nombres": "Eva"})
+            await members_service.delete_member(member["id"])
+            assert http_client.get_client() is shared
+        finally:
+            await http_client.close_client()
+        assert created == []
+        assert shared.is_closed
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_one_login_and_relogin_after_401():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10)
+        await http_client.init_client(fake.transport())
+        manager = members_service.token_manager
+        before = manager.stats()
+
+        def delta(key):
+            return manager.stats()[key] - before[key]
+
+        try:
+            results = await asyncio.gather(*(members_service.get_all_members() for _ in range(20)))
+            assert all(len(members) == 10 for members in results)
+            # 40 llamadas a colecciones, un solo login; el resto usa el token en caché
+            assert fake.calls["auth"] == 1
+            assert delta("refreshes") == 1 and delta("hits") == 39
+
+            # Token revocado: un 401 invalida el token y se reintenta una vez con uno nuevo
+            fake.inject(times=1, status=401)
+            assert len(await members_service.get_all_members()) == 10
+            assert fake.calls["auth"] == 2
+            assert delta("invalidations") == 1 and delta("refreshes") == 2
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("skip_total", [False, True])
+def test_concurrent_page_fetch_keeps_pocketbase_order(skip_total, monkeypatch):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=1600, roles=0, chapters=0)
+        handle = fake.handle
+
+        async def later_pages_answer_first(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params.get("page", 1))
+            await asyncio.sleep(0.01 * (5 - page))
+            return await handle(request)
+
+        monkeypatch.setattr(members_service, "SKIP_TOTAL", skip_total)
+        await http_client.init_client(httpx.MockTransport(later_pages_answer_first))
+        try:
+            items = await members_service._fetch_all_records(
+                http_client.get_client(), "usuario", concurrency=3
+            )
+        finally:
+            await http_client.close_client()
+        assert [item["id"] for item in items] == list(fake.collections["usuario"])
+        # 4 páginas de 500; sin total, la tanda de páginas 2-4 termina en la incompleta
+        assert fake.calls[("GET", "usuario")] == 4
+
+    asyncio.run(scenario())
+
+
+def test_writes_patch_the_cached_projection_without_rebuilding():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10, roles=2, chapters=2)
+        await http_client.init_client(fake.transport())
+        cache = members_service.members_cache
+        try:
+            await members_service.get_cached_members()
+            refreshes, lists = cache.stats()["refreshes"], fake.calls[("GET", "usuario")]
+            users = list(fake.collections["usuario"])
+            rol_id = next(iter(fake.collections["rol"]))
+
+            created = await members_service.create_member(
+                {"nombres": "Ana", "apellidos": "Paz", "rol": rol_id, "semestre_ingreso": "2024-1"}
+            )
+            await members_service.update_member(users[1], {"nombres": "Beto"})
+            await members_service.delete_member(users[2])
+
+            result = await members_service.get_cached_members()
+            assert result.status == "HIT"
+            assert cache.stats()["refreshes"] == refreshes
+            assert fake.calls[("GET", "usuario")] == lists
+            index = result.value
+            assert index.get(created["id"]).nombre == "Ana Paz"
+            assert index.get(created["id"]).rol == "Rol 0"
+            assert index.get(users[1]).nombre == "Beto Apellido1"
+            assert users[2] not in index and len(index) == 10
+            # La proyección parchada es la misma que una reconstrucción completa
+            assert index.members() == (await members_service._load_member_index()).members()
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_write_during_a_slow_refresh_is_not_lost():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10)
+        await http_client.init_client(fake.transport())
+        cache = members_service.members_cache
+        try:
+            await members_service.get_cached_members()
+            user_id = next(iter(fake.collections["usuario"]))
+
+            # La recarga lee usuarios antes de que la escritura llegue a PocketBase
+            fake.latency = 0.05
+            refresh = cache.refresh()
+            await asyncio.sleep(0.01)
+            await members_service.update_member(user_id, {"nombres": "Zoe"})
+            await refresh
+
+            assert cache.peek().get(user_id).nombre.startswith("Zoe")
+            cache.invalidate()
+            fake.latency = 0.0
+            result = await members_service.get_cached_members()
+            assert result.value.get(user_id).nombre.startswith("Zoe")
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
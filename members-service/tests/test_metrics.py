@@ -0,0 +1,82 @@
+# tests/test_metrics.py
+import asyncio
+
+import httpx
+import pytest
+from fake_pocketbase import FakePocketBase
+from prometheus_client import REGISTRY
+
+import main
+from app.utils import http_client
+from app.utils.metrics import upstream_call
+from app.utils.resilience import DeadlineExceeded, ResilientCaller
+
+
+def test_metrics_endpoint_reports_routes_stages_and_upstream_calls():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10)
+        await http_client.init_client(fake.transport())
+        transport = httpx.ASGITransport(app=main.app, client=("127.0.0.1", 50000))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/members/")
+                await client.get("/members/")
+                await client.delete("/members/noexiste")
+                return (await client.get("/metrics")).text
+        finally:
+            await http_client.close_client()
+
+    text = asyncio.run(scenario())
+    lines = text.splitlines()
+
+    def has(prefix: str, *parts: str) -> bool:
+        return any(line.startswith(prefix) and all(p in line for p in parts) for line in lines)
+
+    assert has("members_http_request_duration_seconds_count",
+               'method="GET"', 'route="/members/"', 'status="200"')
+    # La plantilla de la ruta, no el id
+    assert has("members_http_request_duration_seconds_count",
+               'route="/members/{member_id}"', 'status="500"')
+    for stage in ("auth", "fetch_users", "fetch_relations", "transform", "serialize"):
+        assert has("members_stage_duration_seconds_count", f'stage="{stage}"')
+    assert has("members_pocketbase_request_duration_seconds_count",
+               'collection="usuario"', 'operation="list"', 'status="200"')
+    assert has("members_pocketbase_request_duration_seconds_count",
+               'collection="usuario"', 'operation="delete"', 'status="404"')
+    assert has("members_cache_hits_total")
+    assert has("members_rate_limit_allowed_total")
+    assert has("members_http_requests_in_flight")
+
+
+def test_upstream_timeouts_are_recorded_and_disconnects_are_not():
+    def sample(name: str, collection: str, **labels):
+        return REGISTRY.get_sample_value(
+            name, {"collection": collection, "operation": "list", **labels}
+        ) or 0
+
+    async def scenario():
+        caller = ResilientCaller(deadline=0.05, max_retries=0, hedge=False)
+
+        def slow(collection: str):
+            async def send():
+                with upstream_call("GET", f"http://pb/api/collections/{collection}/records"):
+                    await asyncio.sleep(1)
+            return send
+
+        with pytest.raises(DeadlineExceeded):
+            await caller.call("GET", slow("lento"))
+
+        # El cliente se desconecta antes del plazo: no es una falla de PocketBase
+        request = asyncio.ensure_future(caller.call("GET", slow("abandonado")))
+        await asyncio.sleep(0.01)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+
+    asyncio.run(scenario())
+    duration = "members_pocketbase_request_duration_seconds"
+    assert sample(f"{duration}_count", "lento", status="timeout") == 1
+    assert sample(f"{duration}_sum", "lento", status="timeout") >= 0.05
+    assert sample("members_pocketbase_errors_total", "lento") == 1
+    assert sample(f"{duration}_count", "abandonado", status="timeout") == 0
+    assert sample("members_pocketbase_errors_total", "abandonado") == 0
@@ -0,0 +1,73 @@
+# tests/test_rate_limiter.py
+import asyncio
+import socket
+
+import pytest
+
+from app.utils.rate_limiter import (
+    MemoryStore, SQLiteStore, SlidingWindowCounter, TokenBucket, TrustedProxies,
+    resolve_client_ip
+)
+
+
+@pytest.mark.parametrize("algorithm", [TokenBucket, SlidingWindowCounter])
+def test_limits_and_recovers(algorithm, tmp_path):
+    for store in (MemoryStore(algorithm(5, 10)),
+                  SQLiteStore(algorithm(5, 10), path=str(tmp_path / "rl.db"))):
+        decisions = [store.hit("1.2.3.4", 1000 + i * 0.1) for i in range(6)]
+        assert [d.allowed for d in decisions] == [True] * 5 + [False]
+        assert decisions[4].remaining == 0
+        assert decisions[5].retry_after > 0
+        assert store.hit("1.2.3.4", 1025).allowed
+
+
+def test_memory_store_evicts_idle_and_excess_clients():
+    store = MemoryStore(SlidingWindowCounter(5, 10), max_clients=3)
+    for i in range(10):
+        store.hit(f"10.0.0.{i}", 1000 + i)
+    assert len(store) == 3
+    store.hit("10.0.1.1", 1100)
+    assert len(store) == 1
+
+
+def test_real_ip_only_trusted_from_gateway():
+    gateway = TrustedProxies("localhost")
+    asyncio.run(gateway.refresh())
+    assert resolve_client_ip("127.0.0.1", "200.1.1.1", trusted=gateway) == "200.1.1.1"
+    # Otro contenedor o un host de la LAN no puede elegir su propia clave
+    assert resolve_client_ip("172.18.0.9", "200.1.1.1", trusted=gateway) == "172.18.0.9"
+    assert resolve_client_ip("8.8.8.8", "200.1.1.1", trusted=gateway) == "8.8.8.8"
+
+
+def test_forwarded_for_uses_the_rightmost_untrusted_hop():
+    proxies = TrustedProxies("10.0.0.0/8, 172.18.0.5")
+    # El cliente puede anteponer entradas falsas; cuenta la que agregó el primer proxy
+    chain = "6.6.6.6, 200.1.1.1, 10.0.0.7"
+    assert resolve_client_ip("172.18.0.5", forwarded_for=chain, trusted=proxies) == "200.1.1.1"
+    assert resolve_client_ip("172.18.0.5", forwarded_for="10.0.0.2", trusted=proxies) == "10.0.0.2"
+    assert resolve_client_ip("172.18.0.6", forwarded_for=chain, trusted=proxies) == "172.18.0.6"
+
+
+def test_hostnames_resolve_in_background_never_per_request(monkeypatch):
+    answers = {"nginx_gateway": [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("172.18.0.5", 0))]}
+    lookups = []
+
+    def getaddrinfo(host, *args, **kwargs):
+        lookups.append(host)
+        if host not in answers:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return answers[host]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    proxies = TrustedProxies("nginx_gateway")
+    # Antes de resolver no hay direcciones de confianza, y la consulta no resuelve
+    assert "172.18.0.5" not in proxies and lookups == []
+
+    asyncio.run(proxies.refresh())
+    assert "172.18.0.5" in proxies and "172.18.0.6" not in proxies
+    assert lookups == ["nginx_gateway"]
+
+    # Si el nombre deja de resolver se conservan las últimas direcciones conocidas
+    answers.clear()
+    asyncio.run(proxies.refresh())
+    assert "172.18.0.5" in proxies and lookups == ["nginx_gateway"] * 2
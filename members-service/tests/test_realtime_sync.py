@@ -0,0 +1,92 @@
+# tests/test_realtime_sync.py
+import asyncio
+
+from fake_pocketbase import FakePocketBase
+
+from app.services import members_service
+from app.services.realtime_sync import RealtimeSubscriber
+from app.utils import http_client
+
+
+async def _wait_until(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timeout esperando la condición"
+        await asyncio.sleep(0.01)
+
+
+async def _assert_in_sync():
+    """
+    La proyección mantenida por realtime debe coincidir con una reconstrucción completa.
+    """
+    expected = await members_service.get_all_members()
+    await _wait_until(lambda: members_service.members_cache.peek().members() == expected)
+
+
+def test_realtime_events_keep_projection_in_sync():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=20, roles=3, chapters=4)
+        await http_client.init_client(fake.transport())
+        subscriber = RealtimeSubscriber()
+        subscriber.start()
+        try:
+            await _wait_until(lambda: subscriber.connected)
+            assert members_service.members_cache.live
+            await _assert_in_sync()
+
+            user_id = next(iter(fake.collections["usuario"]))
+            fake.update("usuario", user_id, nombres="Zoe")
+            await _assert_in_sync()
+
+            rol_id = next(iter(fake.collections["rol"]))
+            fake.update("rol", rol_id, rol="Presidente")
+            await _assert_in_sync()
+
+            cap = fake.add("capitulo", capitulo="Robótica", descripcion="")
+            new_user = fake.add("usuario", nombres="Ana", apellidos="Rios", rol=rol_id,
+                                semestre_ingreso="2024-1")
+            fake.add("usuario_capitulo", usuario=new_user["id"], capitulo=cap["id"])
+            await _assert_in_sync()
+
+            rel_id = next(iter(fake.collections["usuario_capitulo"]))
+            fake.delete("usuario_capitulo", rel_id)
+            fake.delete("usuario", user_id)
+            await _assert_in_sync()
+
+            # La lectura se resuelve en memoria, sin llamadas a PocketBase
+            calls = sum(fake.calls.values())
+            result = await members_service.get_cached_members()
+            assert result.status == "HIT"
+            assert sum(fake.calls.values()) == calls
+        finally:
+            await subscriber.stop()
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_realtime_resyncs_after_disconnect():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=5)
+        await http_client.init_client(fake.transport())
+        subscriber = RealtimeSubscriber()
+        subscriber.start()
+        try:
+            await _wait_until(lambda: subscriber.connected)
+
+            fake.disconnect_all()
+            await _wait_until(lambda: not subscriber.connected)
+            # Cambio hecho mientras no hay conexión: el evento se pierde
+            user_id = next(iter(fake.collections["usuario"]))
+            fake.update("usuario", user_id, nombres="Perdido")
+
+            await _wait_until(lambda: subscriber.connected)
+            assert subscriber.resyncs == 2
+            await _assert_in_sync()
+        finally:
+            await subscriber.stop()
+            await http_client.close_client()
+
+    asyncio.run(scenario())
@@ -0,0 +1,137 @@
+# tests/test_resilience.py
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fake_pocketbase import FakePocketBase
+
+from app.services import members_service
+from app.utils import http_client
+from app.utils.resilience import CircuitBreaker, ResilientCaller
+
+
+def test_reads_retry_transient_errors_and_writes_do_not():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10)
+        await http_client.init_client(fake.transport())
+        try:
+            retries = members_service.pocketbase_calls.metrics["retries"]
+            fake.inject(times=2, status=503)
+            assert len(await members_service.get_all_members()) == 10
+            assert members_service.pocketbase_calls.metrics["retries"] - retries == 2
+
+            fake.inject(times=1, status=503)
+            with pytest.raises(HTTPException):
+                await members_service.create_member({"nombres": "Ana"})
+            assert len(fake.collections["usuario"]) == 10
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_open_breaker_fails_fast_and_serves_cached_members():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=10)
+        members_service.pocketbase_calls.breaker = CircuitBreaker(
+            failure_rate=0.5, min_calls=3, open_seconds=60
+        )
+        await http_client.init_client(fake.transport())
+        try:
+            await members_service.get_cached_members()
+            fake.inject(times=100, error=httpx.ConnectError("PocketBase caído"))
+
+            # Con PocketBase caído se sigue sirviendo la última proyección conocida
+            members_service.members_cache.invalidate()
+            result = await members_service.get_cached_members()
+            assert result.status == "STALE" and len(result.value) == 10
+            assert members_service.pocketbase_calls.breaker.state == CircuitBreaker.OPEN
+
+            # Con el circuito abierto no se contacta a PocketBase
+            calls = sum(fake.calls.values())
+            with pytest.raises(HTTPException) as error:
+                await members_service.get_all_members()
+            assert error.value.status_code == 503
+            assert int(error.value.headers["Retry-After"]) > 0
+            assert sum(fake.calls.values()) == calls
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_failing_admin_login_trips_the_breaker():
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=3)
+        members_service.pocketbase_calls.breaker = CircuitBreaker(
+            failure_rate=0.5, min_calls=3, open_seconds=60
+        )
+
+        async def handle(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/admins/auth-with-password":
+                fake.calls["auth"] += 1
+                return httpx.Response(500, json={"code": 500, "message": "Error interno"})
+            return await fake.handle(request)
+
+        await http_client.init_client(httpx.MockTransport(handle))
+        try:
+            for _ in range(3):
+                with pytest.raises(HTTPException) as error:
+                    await members_service.get_all_members()
+                assert error.value.status_code == 500
+            assert members_service.pocketbase_calls.breaker.state == CircuitBreaker.OPEN
+
+            with pytest.raises(HTTPException) as error:
+                await members_service.get_all_members()
+            assert error.value.status_code == 503 and fake.calls["auth"] == 3
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(scenario())
+
+
+def test_breaker_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window=10, open_seconds=5)
+    breaker.record(True, now=0)
+    breaker.record(True, now=1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(Exception):
+        breaker.allow(now=2)
+
+    breaker.allow(now=7)  # prueba semiabierta
+    with pytest.raises(Exception):
+        breaker.allow(now=7)  # solo una prueba a la vez
+    breaker.record(True, now=8)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.allow(now=14)
+    breaker.record(False, now=14)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_get_uses_the_fastest_response():
+    async def scenario():
+        caller = ResilientCaller(deadline=1.0, hedge=True)
+        delays = iter([0.8, 0.0])
+        cancelled = []
+
+        async def send():
+            delay = next(delays)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return httpx.Response(200, json={"delay": delay})
+
+        response = await caller.call("GET", send)
+        assert response.json() == {"delay": 0.0}
+        assert caller.metrics["hedges"] == 1 and caller.metrics["hedge_wins"] == 1
+        await asyncio.sleep(0)
+        assert cancelled == [0.8]
+
+    asyncio.run(scenario())
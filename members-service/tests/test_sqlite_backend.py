@@ -0,0 +1,88 @@
+# tests/test_sqlite_backend.py
+import asyncio
+import sqlite3
+
+from fake_pocketbase import FakePocketBase
+
+from app.services import members_service, sqlite_backend
+from app.utils import http_client
+
+# Esquema equivalente al de PocketBase (relaciones simples guardadas como id en texto)
+SCHEMA = {
+    "rol": ["rol"],
+    "capitulo": ["capitulo", "descripcion", "usuario"],
+    "usuario": ["nombres", "apellidos", "email_p", "email_u", "numero", "rol",
+                "semestre_ingreso", "fecha_ingreso_sce"],
+    "usuario_capitulo": ["usuario", "capitulo"],
+}
+
+
+def _dump(fake: FakePocketBase, path: str):
+    """
+    Copia los datos del PocketBase falso a un data.db, en el mismo orden de inserción.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    for collection, fields in SCHEMA.items():
+        columns = ["id", "created", "updated", *fields]
+        conn.execute(
+            f"CREATE TABLE {collection} (id TEXT PRIMARY KEY NOT NULL, "
+            + ", ".join(f"{c} TEXT DEFAULT '' NOT NULL" for c in columns[1:]) + ")"
+        )
+        conn.executemany(
+            f"INSERT INTO {collection} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [[record.get(c, "") for c in columns] for record in fake.collections[collection].values()],
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_sqlite_backend_matches_http_api(tmp_path, monkeypatch):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=40, roles=3, chapters=4, relations_per_user=2)
+        fake.add("usuario", notify=False, nombres="Sin", apellidos="Rol", rol="",
+                 semestre_ingreso="2")
+        # Relación hacia un capítulo inexistente: la expansión queda vacía en ambos casos
+        user = next(iter(fake.collections["usuario"].values()))
+        fake.add("usuario_capitulo", notify=False, usuario=user["id"], capitulo="noexiste")
+        path = str(tmp_path / "data.db")
+        _dump(fake, path)
+
+        await http_client.init_client(fake.transport())
+        try:
+            via_http = await members_service._load_member_index()
+            pool = sqlite_backend.SQLiteReadPool(path)
+            monkeypatch.setattr(sqlite_backend, "_pool", pool)
+            monkeypatch.setattr(sqlite_backend, "MEMBERS_READ_BACKEND", "sqlite")
+            fake.calls.clear()
+            via_sqlite = await members_service._load_member_index()
+            pool.close()
+        finally:
+            await http_client.close_client()
+
+        assert sum(fake.calls.values()) == 0
+        assert len(via_sqlite) == 41
+        assert via_sqlite.members() == via_http.members()
+        assert via_sqlite.last_modified == via_http.last_modified
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_backend_falls_back_to_http(tmp_path, monkeypatch):
+    async def scenario():
+        fake = FakePocketBase()
+        fake.seed(users=5)
+        monkeypatch.setattr(sqlite_backend, "_pool", sqlite_backend.SQLiteReadPool(
+            str(tmp_path / "no-existe.db")
+        ))
+        monkeypatch.setattr(sqlite_backend, "MEMBERS_READ_BACKEND", "sqlite")
+        await http_client.init_client(fake.transport())
+        try:
+            index = await members_service._load_member_index()
+        finally:
+            await http_client.close_client()
+        assert len(index) == 5
+        assert fake.calls
+
+    asyncio.run(scenario())